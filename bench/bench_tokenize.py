@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+bench_tokenize.py — Tokenizer throughput: reference loop vs build.py
+
+Compares the original per-token filter loop with build.tokenize_and_count
+(C counting + drop-set pass) and build.count_text_mmap (bytes-level scan)
+on the same deterministic text, and checks that all three agree.
+
+Usage:
+    python bench/bench_tokenize.py            # 20 MB of text
+    python bench/bench_tokenize.py --mb 100   # larger sample
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import build  # noqa: E402
+
+
+def reference_tokenize_and_count(text):
+    """tokenize_and_count as it was before the fused counting engine."""
+    words = build._WORD_RE.findall(text.lower())
+    counter = Counter()
+    for w in words:
+        if len(w) < 1 or len(w) > 40:
+            continue
+        if w in build.ENGLISH_STOPWORDS and w not in build.SHARED_WORDS:
+            continue
+        counter[w] += 1
+    return counter
+
+
+def sample_text(mb, seed=0):
+    rng = random.Random(seed)
+    vocab = list(build.SWADESH_SWEDISH) + sorted(build.ENGLISH_STOPWORDS)
+    vocab += ["Ärligt", "SKÄRGÅRDEN", "Öfverste", "x" * 45]
+    weights = [1 / (rank + 1) for rank in range(len(vocab))]
+    target = mb * 1024 * 1024
+    parts = []
+    size = 0
+    while size < target:
+        line = " ".join(rng.choices(vocab, weights, k=12)) + ".\n"
+        parts.append(line)
+        size += len(line.encode("utf-8"))
+    return "".join(parts)
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark build.py tokenizers")
+    parser.add_argument("--mb", type=int, default=20, help="Text size in MB (default: 20)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    args = parser.parse_args()
+
+    text = sample_text(args.mb, args.seed)
+    n_tokens = len(build._WORD_RE.findall(text))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sample.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+        ref, t_ref = timed(reference_tokenize_and_count, text)
+        new, t_new = timed(build.tokenize_and_count, text)
+        (mapped, _), t_mmap = timed(build.count_text_mmap, path)
+
+    print(f"  {args.mb} MB, {n_tokens:,} tokens")
+    print(f"  {'engine':<24}{'seconds':>10}{'Mtok/s':>10}{'speedup':>10}")
+    for name, secs in (
+        ("reference loop", t_ref),
+        ("tokenize_and_count", t_new),
+        ("count_text_mmap", t_mmap),
+    ):
+        print(f"  {name:<24}{secs:>10.3f}{n_tokens / secs / 1e6:>10.2f}{t_ref / secs:>9.1f}x")
+
+    if new != ref or mapped != ref:
+        print("\n  ERROR: engines disagree", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+check_stream.py — Randomized check of build.count_text_stream
+
+count_text_stream claims the same result as strip_gutenberg_boilerplate
+followed by tokenize_and_count on the joined text. This builds many short
+texts out of start/end markers (every priority), words and newlines, feeds
+each one in chunks of a random size, and compares the two.
+
+Texts always end in a newline: a start marker on an unterminated last line
+is the one documented difference.
+
+Usage:
+    python bench/check_stream.py                     # 200,000 texts
+    python bench/check_stream.py --trials 1000000 --seed 7
+"""
+
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import build  # noqa: E402
+
+PIECES = build._START_MARKERS + build._END_MARKERS + [
+    "\n", "ord ", "och ", "hus\n", " x ", "åka ", "Skärgården, ",
+]
+
+
+def random_text(rng):
+    text = "".join(rng.choice(PIECES) for _ in range(rng.randint(0, 12)))
+    return text if text.endswith("\n") else text + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check count_text_stream against strip + tokenize")
+    parser.add_argument("--trials", type=int, default=200_000,
+                        help="Number of random texts (default: 200000)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed (default: 1)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    mismatches = 0
+    for _ in range(args.trials):
+        text = random_text(rng)
+        size = rng.randint(1, 60)
+        chunks = [text[i : i + size] for i in range(0, len(text), size)]
+        got, _ = build.count_text_stream(chunks)
+        expected = build.tokenize_and_count(build.strip_gutenberg_boilerplate(text))
+        if got != expected:
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"  chunk size {size}: {text!r}")
+                print(f"    stream {dict(got)}  expected {dict(expected)}")
+
+    print(f"  {args.trials:,} texts, {mismatches} mismatches")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
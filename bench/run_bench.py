@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+run_bench.py — Stage-by-stage throughput of build.py on a synthetic corpus
+
+Generates (or reuses) a deterministic corpus with synth_corpus.py, then
+times each build stage in-process and reports MB/s and tokens/s:
+
+    collect_files, extract_text, tokenize_and_count, count_file (the fused
+    path the workers use), merge, write_freq_txt, write_freq_bin, render_html
+
+and, with --workers, the full parallel build_frequency_counter.
+
+Usage:
+    python bench/run_bench.py                          # 10 MB corpus
+    python bench/run_bench.py --size 1G --workers 8
+    python bench/run_bench.py --corpus /data/synth --json bench.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, ".."))
+sys.path.insert(0, BENCH_DIR)
+
+import build  # noqa: E402
+from synth_corpus import generate_corpus, parse_size  # noqa: E402
+
+
+class StageTimes:
+    def __init__(self):
+        self.rows = []
+
+    def add(self, stage, seconds, n_bytes=0, n_tokens=0):
+        self.rows.append(
+            {"stage": stage, "seconds": seconds, "bytes": n_bytes, "tokens": n_tokens}
+        )
+
+    def report(self):
+        print(f"\n  {'stage':<26}{'seconds':>10}{'MB/s':>10}{'Mtok/s':>10}")
+        print("  " + "-" * 56)
+        for row in self.rows:
+            secs = row["seconds"]
+            mbs = row["bytes"] / secs / 1024 / 1024 if row["bytes"] and secs else 0
+            mtoks = row["tokens"] / secs / 1e6 if row["tokens"] and secs else 0
+            mb_col = f"{mbs:>10.1f}" if mbs else f"{'':>10}"
+            tok_col = f"{mtoks:>10.2f}" if mtoks else f"{'':>10}"
+            print(f"  {row['stage']:<26}{secs:>10.3f}{mb_col}{tok_col}")
+
+
+def ensure_corpus(corpus_dir, size, seed):
+    has_books = os.path.isdir(corpus_dir) and any(
+        os.path.splitext(name)[1] in build.HANDLERS for name in os.listdir(corpus_dir)
+    )
+    if not has_books:
+        print(f"  Generating {size} corpus in {corpus_dir}/ (seed {seed})...")
+        generate_corpus(corpus_dir, parse_size(size), seed=seed)
+
+
+def run(corpus_dir, workers=0, reduce="batch"):
+    times = StageTimes()
+
+    t0 = time.perf_counter()
+    files = build.collect_files(corpus_dir)
+    times.add("collect_files", time.perf_counter() - t0)
+    n_bytes = sum(os.path.getsize(f) for f in files)
+
+    # Classic split: full text first, then tokenize it
+    t_extract = t_tokenize = 0.0
+    n_tokens = 0
+    for filepath in files:
+        t0 = time.perf_counter()
+        text = build.extract_text(filepath)
+        t1 = time.perf_counter()
+        counter = build.tokenize_and_count(text or "")
+        t2 = time.perf_counter()
+        t_extract += t1 - t0
+        t_tokenize += t2 - t1
+        n_tokens += sum(counter.values())
+    times.add("extract_text", t_extract, n_bytes)
+    times.add("tokenize_and_count", t_tokenize, n_bytes, n_tokens)
+
+    # What the workers actually run: streaming/mmap counting into shards
+    shards = []
+    book_stats = []
+    t0 = time.perf_counter()
+    for filepath in files:
+        result = build.count_file(filepath)
+        if result is not None:
+            shards.append(build.encode_shard(result[0]))
+            book_stats.append((os.path.basename(filepath), sum(result[0].values())))
+    times.add("count_file + encode", time.perf_counter() - t0, n_bytes, n_tokens)
+
+    t0 = time.perf_counter()
+    totals = {}
+    for shard in shards:
+        build.merge_shard_into(totals, shard)
+    total_counter = build.Counter(totals)
+    times.add("merge", time.perf_counter() - t0, 0, n_tokens)
+
+    total_words = sum(total_counter.values())
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            t0 = time.perf_counter()
+            build.write_freq_txt(total_counter, book_stats, total_words)
+            times.add("write_freq_txt", time.perf_counter() - t0,
+                      os.path.getsize(build.OUTPUT_FREQ_TXT))
+            t0 = time.perf_counter()
+            build.write_freq_dict(total_counter, build.OUTPUT_FREQ_BIN, total_words)
+            times.add("write_freq_bin", time.perf_counter() - t0,
+                      os.path.getsize(build.OUTPUT_FREQ_BIN))
+        finally:
+            os.chdir(cwd)
+
+    t0 = time.perf_counter()
+    swadesh_data = build.build_swadesh_data(total_counter)
+    tiers = build.compute_tier_coverage(swadesh_data, total_words)
+    html = build.render_html(swadesh_data, total_words, len(book_stats), tiers)
+    times.add("render_html", time.perf_counter() - t0, len(html.encode("utf-8")))
+
+    if workers:
+        t0 = time.perf_counter()
+        build.build_frequency_counter(files, workers, None, reduce)
+        times.add(f"build_frequency_counter/{workers}", time.perf_counter() - t0,
+                  n_bytes, n_tokens)
+
+    summary = {
+        "files": len(files),
+        "bytes": n_bytes,
+        "tokens": n_tokens,
+        "unique_words": len(total_counter),
+    }
+    return times, summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark build.py stages")
+    parser.add_argument("--corpus", default=None,
+                        help="Corpus directory (generated if empty; default: a temp dir)")
+    parser.add_argument("--size", default="10M", help="Corpus size to generate (default: 10M)")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus seed (default: 0)")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Also time the parallel build with N workers")
+    parser.add_argument("--reduce", choices=build.REDUCE_STRATEGIES, default="batch",
+                        help="Reduce strategy for the parallel run (default: batch)")
+    parser.add_argument("--json", default=None, help="Also write results to this JSON file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus_dir = args.corpus or os.path.join(tmp, "books")
+        ensure_corpus(corpus_dir, args.size, args.seed)
+        times, summary = run(corpus_dir, args.workers, args.reduce)
+
+    print(f"\n  Corpus: {summary['files']} files, {summary['bytes'] / 1024 / 1024:.1f} MB, "
+          f"{summary['tokens']:,} tokens, {summary['unique_words']:,} unique")
+    times.report()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"summary": summary, "stages": times.rows}, f, indent=2)
+        print(f"\n  Wrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
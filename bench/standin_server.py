@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+standin_server.py — Local stand-in for Gutenberg and Internet Archive
+
+Serves fixture books over HTTP/1.1 (keep-alive) with the URL layout
+download_books.py expects, so both download engines can be exercised and
+timed offline:
+
+    /browse/languages/sv                 Gutenberg catalog (links to /ebooks/N)
+    /cache/epub/N/pgN.txt                Gutenberg book text
+    /advancedsearch.php?q=...            IA search (Litteraturbanken or other)
+    /metadata/ID/files                   IA item file list
+    /download/ID/NAME                    IA file
+
+Book and PDF downloads honour "Range: bytes=N-" (and If-Range); the other
+responses carry an ETag and answer If-None-Match with 304.
+
+.txt fixtures are split between Gutenberg books and IA items (as
+_djvu.txt); .pdf fixtures become Litteraturbanken items. Without
+--fixtures, small synthetic books are generated with synth_corpus.py.
+
+Usage:
+    python bench/standin_server.py                       # 200 synthetic books
+    python bench/standin_server.py --fixtures books --latency 50
+    python bench/standin_server.py --truncate 0.3    # cut 30% of transfers
+    # then, in an empty directory:
+    python download_books.py --engine async \\
+        --gutenberg-url http://127.0.0.1:8765 --archive-url http://127.0.0.1:8765 \\
+        --host-limit 127.0.0.1=200:16 --workers 16
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synth_corpus import generate_corpus, parse_size  # noqa: E402
+
+LITTBANK_PREFIX = "arkivkopia.se-littbank-"
+
+
+def build_catalog(fixtures_dir):
+    """Map fixture files onto the three sources' identifiers."""
+    names = sorted(os.listdir(fixtures_dir))
+    txts = [n for n in names if n.endswith(".txt")]
+    pdfs = [n for n in names if n.endswith(".pdf")]
+    catalog = {"gutenberg": {}, "littbank": {}, "ia": {}}
+    for i, name in enumerate(txts):
+        path = os.path.join(fixtures_dir, name)
+        if i % 2 == 0:
+            catalog["gutenberg"][str(10000 + i)] = path
+        else:
+            catalog["ia"][f"standin-{i:06d}"] = path
+    for i, name in enumerate(pdfs):
+        catalog["littbank"][f"{LITTBANK_PREFIX}standin{i:06d}"] = os.path.join(fixtures_dir, name)
+    return catalog
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so clients can pool connections
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    def send_body(self, body, content_type):
+        """Send a catalog/search/metadata body with an ETag; 304 if it matches."""
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, data):
+        self.send_body(json.dumps(data).encode("utf-8"), "application/json")
+
+    def send_file(self, path):
+        """Send a fixture file, honouring a single "bytes=N-" Range request.
+
+        The Range is ignored (full 200 response) if an If-Range header does
+        not match the file's ETag or Last-Modified. With --truncate, that
+        fraction of transfers is cut off halfway, so clients' resume logic
+        gets exercised.
+        """
+        st = os.stat(path)
+        size = st.st_size
+        etag = f'"{st.st_mtime_ns:x}-{size:x}"'
+        last_modified = formatdate(st.st_mtime, usegmt=True)
+        start = 0
+        match = re.fullmatch(r"bytes=(\d+)-", self.headers.get("Range", ""))
+        if_range = self.headers.get("If-Range")
+        if match and if_range not in (None, etag, last_modified):
+            match = None  # changed since the client's part was started
+        if match:
+            start = int(match.group(1))
+            if start >= size:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{size - 1}/{size}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        self.send_header("Content-Length", str(size - start))
+        self.end_headers()
+        to_send = size - start
+        if random.random() < self.server.truncate:
+            to_send //= 2
+            self.close_connection = True
+        with open(path, "rb") as f:
+            f.seek(start)
+            while to_send > 0:
+                chunk = f.read(min(65536, to_send))
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                to_send -= len(chunk)
+
+    def not_found(self):
+        self.send_response(404)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        catalog = self.server.catalog
+        url = urlsplit(self.path)
+        parts = [p for p in url.path.split("/") if p]
+
+        if url.path == "/browse/languages/sv":
+            links = "".join(f'<li><a href="/ebooks/{n}">Book {n}</a></li>\n'
+                            for n in catalog["gutenberg"])
+            self.send_body(f"<html><body><ul>\n{links}</ul></body></html>".encode(),
+                           "text/html; charset=utf-8")
+        elif url.path == "/advancedsearch.php":
+            query = parse_qs(url.query)
+            rows = int(query.get("rows", ["1000"])[0])
+            source = "littbank" if "littbank" in query.get("q", [""])[0] else "ia"
+            docs = [{"identifier": ident} for ident in list(catalog[source])[:rows]]
+            self.send_json({"response": {"numFound": len(docs), "docs": docs}})
+        elif len(parts) == 4 and parts[:2] == ["cache", "epub"] and parts[2] in catalog["gutenberg"]:
+            self.send_file(catalog["gutenberg"][parts[2]])
+        elif len(parts) == 3 and parts[0] == "metadata" and parts[2] == "files":
+            path = catalog["ia"].get(parts[1])
+            if path is None:
+                return self.not_found()
+            self.send_json({"result": [
+                {"name": f"{parts[1]}_djvu.txt", "size": str(os.path.getsize(path))},
+                {"name": f"{parts[1]}_meta.xml", "size": "1200"},
+            ]})
+        elif len(parts) == 3 and parts[0] == "download":
+            ident = parts[1]
+            path = catalog["ia"].get(ident) or catalog["littbank"].get(ident)
+            if path is None:
+                return self.not_found()
+            self.send_file(path)
+        else:
+            self.not_found()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve fixture books like Gutenberg and IA")
+    parser.add_argument("--fixtures", default=None,
+                        help="Directory of .txt/.pdf fixtures (default: generate synthetic books)")
+    parser.add_argument("--books", type=int, default=200,
+                        help="Synthetic books to generate without --fixtures (default: 200)")
+    parser.add_argument("--book-size", default="40K", help="Mean synthetic book size (default: 40K)")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="Port (default: 8765)")
+    parser.add_argument("--latency", type=float, default=0,
+                        help="Added latency per request in ms (default: 0)")
+    parser.add_argument("--truncate", type=float, default=0,
+                        help="Fraction of file transfers to cut off halfway (default: 0)")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fixtures_dir = args.fixtures
+        if fixtures_dir is None:
+            fixtures_dir = os.path.join(tmp, "fixtures")
+            book_bytes = parse_size(args.book_size)
+            generate_corpus(fixtures_dir, args.books * book_bytes, seed=0,
+                            epub_share=0, mean_book_bytes=book_bytes, progress=False)
+
+        server = ThreadingHTTPServer((args.host, args.port), StandinHandler)
+        server.daemon_threads = True
+        server.catalog = build_catalog(fixtures_dir)
+        server.latency = args.latency / 1000
+        server.truncate = args.truncate
+        server.verbose = args.verbose
+        counts = ", ".join(f"{len(v)} {k}" for k, v in server.catalog.items())
+        print(f"  Serving {counts} on http://{args.host}:{args.port} (Ctrl-C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+synth_corpus.py — Deterministic synthetic Swedish corpus generator
+
+Writes a books/-style directory of fake Swedish books for benchmarking
+build.py offline. The same --seed and --size always produce the same
+bytes.
+
+  - vocabulary: Swadesh words at the top ranks, then Swedish-looking words
+    built from syllables (with å, ä, ö), Zipf-distributed over rank
+  - .txt books wrapped in Project Gutenberg header/footer boilerplate
+  - .epub books (zip of XHTML chapters) for the epub extractor
+
+Usage:
+    python bench/synth_corpus.py bench_corpus            # 10 MB
+    python bench/synth_corpus.py bench_corpus --size 1G  # 1 GB
+    python bench/synth_corpus.py bench_corpus --size 10G --epub-share 0.2
+"""
+
+import argparse
+import itertools
+import math
+import os
+import random
+import sys
+import zipfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from build import SWADESH_SWEDISH  # noqa: E402
+
+ONSETS = ["", "b", "d", "f", "g", "h", "j", "k", "l", "m", "n", "p", "r",
+          "s", "t", "v", "bl", "br", "dr", "fl", "fr", "gr", "kl", "kr",
+          "sk", "sl", "sm", "sn", "sp", "st", "sv", "tr", "skr", "str"]
+NUCLEI = ["a", "e", "i", "o", "u", "y", "å", "ä", "ö", "aa", "ei"]
+CODAS = ["", "", "", "n", "r", "s", "t", "l", "m", "k", "g", "d", "ng",
+         "nd", "rt", "st", "tt", "ll", "nn", "ck"]
+SUFFIXES = ["", "", "", "en", "et", "er", "ar", "or", "na", "ande", "ning",
+            "lig", "het", "a", "de", "te"]
+
+GUTENBERG_HEADER = """\
+The Project Gutenberg eBook of {title}
+
+This ebook is for the use of anyone anywhere in the United States and
+most other parts of the world at no cost and with almost no restrictions
+whatsoever. You may copy it, give it away or re-use it under the terms
+of the Project Gutenberg License included with this ebook or online
+at www.gutenberg.org.
+
+Title: {title}
+Language: Swedish
+
+*** START OF THE PROJECT GUTENBERG EBOOK {upper} ***
+
+"""
+
+GUTENBERG_FOOTER = """
+
+*** END OF THE PROJECT GUTENBERG EBOOK {upper} ***
+
+Updated editions will replace the previous one--the old editions will
+be renamed. Creating the works from print editions not protected by
+U.S. copyright law means that no one owns a United States copyright in
+these works, so the Foundation (and you!) can copy and distribute it.
+"""
+
+_UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+def parse_size(text):
+    """'10M', '1.5G', '500K' or plain bytes -> int bytes."""
+    text = text.strip().upper().rstrip("B")
+    if text and text[-1] in _UNITS:
+        return int(float(text[:-1]) * _UNITS[text[-1]])
+    return int(text)
+
+
+def make_vocabulary(size, rng):
+    """Swadesh words first, then unique syllable-built words."""
+    vocab = list(SWADESH_SWEDISH)
+    seen = set(vocab)
+    while len(vocab) < size:
+        word = "".join(
+            rng.choice(ONSETS) + rng.choice(NUCLEI) + rng.choice(CODAS)
+            for _ in range(rng.choice((1, 1, 2, 2, 2, 3, 3, 4)))
+        ) + rng.choice(SUFFIXES)
+        if word not in seen:
+            seen.add(word)
+            vocab.append(word)
+    return vocab
+
+
+def zipf_cum_weights(n, s=1.07):
+    return list(itertools.accumulate(1.0 / (rank ** s) for rank in range(1, n + 1)))
+
+
+class BookWriter:
+    """Produces the body text of one book, paragraph by paragraph."""
+
+    def __init__(self, vocab, cum_weights, rng):
+        self.vocab = vocab
+        self.cum_weights = cum_weights
+        self.rng = rng
+
+    def paragraph(self):
+        rng = self.rng
+        sentences = []
+        for _ in range(rng.randint(2, 7)):
+            words = rng.choices(self.vocab, cum_weights=self.cum_weights, k=rng.randint(4, 22))
+            words[0] = words[0].capitalize()
+            sentences.append(" ".join(words) + rng.choice(".....!?"))
+        return " ".join(sentences)
+
+    def body(self, n_bytes):
+        written = 0
+        while written < n_bytes:
+            para = self.paragraph() + "\n\n"
+            written += len(para.encode("utf-8"))
+            yield para
+
+
+def write_txt_book(path, title, writer, n_bytes):
+    upper = title.upper()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(GUTENBERG_HEADER.format(title=title, upper=upper))
+        for para in writer.body(n_bytes):
+            f.write(para)
+        f.write(GUTENBERG_FOOTER.format(upper=upper))
+    return os.path.getsize(path)
+
+
+def write_epub_book(path, title, writer, n_bytes, chapter_bytes=256 * 1024):
+    # Fixed timestamps keep the archive byte-for-byte reproducible
+    def entry(name):
+        return zipfile.ZipInfo(name, date_time=(2000, 1, 1, 0, 0, 0))
+
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr(entry("mimetype"), "application/epub+zip")
+        chapter = 0
+        paras = []
+        size = 0
+        for para in itertools.chain(writer.body(n_bytes), [None]):
+            if para is not None:
+                paras.append(f"<p>{para.strip()}</p>\n")
+                size += len(para)
+            if paras and (para is None or size >= chapter_bytes):
+                chapter += 1
+                html = (
+                    '<?xml version="1.0" encoding="utf-8"?>\n'
+                    '<html xmlns="http://www.w3.org/1999/xhtml"><head>'
+                    f"<title>{title}</title></head><body>\n"
+                    f"<h1>Kapitel {chapter}</h1>\n" + "".join(paras) + "</body></html>\n"
+                )
+                z.writestr(entry(f"OEBPS/chapter{chapter:03d}.xhtml"), html)
+                paras = []
+                size = 0
+    return os.path.getsize(path)
+
+
+def generate_corpus(out_dir, total_bytes, seed=0, vocab_size=200_000,
+                    epub_share=0.1, mean_book_bytes=400 * 1024, progress=True):
+    """Write books into out_dir until about total_bytes of text exist.
+
+    Returns a list of (path, bytes) for the files written.
+    """
+    rng = random.Random(seed)
+    vocab = make_vocabulary(vocab_size, rng)
+    writer = BookWriter(vocab, zipf_cum_weights(len(vocab)), rng)
+    os.makedirs(out_dir, exist_ok=True)
+
+    written = []
+    total = 0
+    sigma = 0.8
+    mu = math.log(mean_book_bytes) - sigma ** 2 / 2
+    for n in itertools.count(1):
+        if total >= total_bytes:
+            break
+        n_bytes = min(int(rng.lognormvariate(mu, sigma)), total_bytes - total)
+        n_bytes = max(n_bytes, 4096)
+        title = " ".join(w.capitalize() for w in rng.sample(vocab[:5000], 3))
+        if rng.random() < epub_share:
+            path = os.path.join(out_dir, f"synth_{n:06d}.epub")
+            write_epub_book(path, title, writer, n_bytes)
+        else:
+            path = os.path.join(out_dir, f"synth_{n:06d}.txt")
+            write_txt_book(path, title, writer, n_bytes)
+        # Count text bytes, not compressed epub bytes, toward the target
+        total += n_bytes
+        written.append((path, os.path.getsize(path)))
+        if progress:
+            print(f"\r  {total / 1024 / 1024:8.1f} / {total_bytes / 1024 / 1024:.1f} MB"
+                  f"  ({len(written)} books)", end="", flush=True)
+    if progress:
+        print()
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic Swedish corpus")
+    parser.add_argument("out_dir", help="Directory to write books into")
+    parser.add_argument("--size", default="10M", help="Total text size, e.g. 10M, 1G, 10G (default: 10M)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument("--vocab", type=int, default=200_000, help="Vocabulary size (default: 200000)")
+    parser.add_argument("--epub-share", type=float, default=0.1,
+                        help="Fraction of books written as .epub (default: 0.1)")
+    parser.add_argument("--book-size", default="400K", help="Mean book size (default: 400K)")
+    args = parser.parse_args()
+
+    files = generate_corpus(
+        args.out_dir,
+        parse_size(args.size),
+        seed=args.seed,
+        vocab_size=args.vocab,
+        epub_share=args.epub_share,
+        mean_book_bytes=parse_size(args.book_size),
+    )
+    on_disk = sum(size for _, size in files)
+    print(f"  Wrote {len(files)} books ({on_disk / 1024 / 1024:.1f} MB on disk) to {args.out_dir}/")
+
+
+if __name__ == "__main__":
+    main()
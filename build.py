@@ -5,26 +5,39 @@ build.py — Swedish Word Frequency Builder
 Drop .txt, .pdf, or .epub files into books/ and run:
     python build.py
 
-Generates index.html with Swadesh vocabulary ranked by real frequency.
+Generates index.html with Swadesh vocabulary ranked by real frequency, plus
+the full word list as text and as a binary dictionary (see freqdict.py).
 
 Usage:
     python build.py                     # process books/ only
     python build.py --include-legacy    # also process swedish_books/
     python build.py --workers 8         # override CPU count
+    python build.py --rebuild-cache     # ignore cached per-file counts
 """
 
 import argparse
+import contextlib
+import functools
+import gzip
+import hashlib
+import io
+import itertools
 import json
 import math
+import mmap
 import multiprocessing
 import os
 import re
+import struct
 import sys
 import time
 import zipfile
+from array import array
 from collections import Counter
 from html.parser import HTMLParser
 
+from freqdict import write_freq_dict
+
 # ---------------------------------------------------------------------------
 # CONFIG
 # ---------------------------------------------------------------------------
@@ -33,6 +46,15 @@ LEGACY_BOOKS_DIR = "swedish_books"
 TEMPLATE_FILE = "template.html"
 OUTPUT_HTML = "index.html"
 OUTPUT_FREQ_TXT = "swedish_word_frequencies.txt"
+OUTPUT_FREQ_BIN = "swedish_word_frequencies.bin"  # see freqdict.py
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+WRITE_BUFFER_BYTES = 1 << 20
+PROFILE_OUTPUT = "build_profile.json"
+SCREEN_REPORT = "screened_books.json"
+QUARANTINE_DIR = "_quarantine"  # inside BOOKS_DIR; never scanned
+DEDUPE_REPORT = "near_duplicates.json"
+COUNT_CACHE_DIR = ".count_cache"
+COUNT_CACHE_VERSION = 2
 
 TIER1_SIZE = 50
 TIER2_SIZE = 100  # words 51-100
@@ -47,6 +69,150 @@ try:
 except ImportError:
     PDF_SUPPORT = False
 
+# ---------------------------------------------------------------------------
+# BROTLI SUPPORT (optional — .br precompressed outputs)
+# ---------------------------------------------------------------------------
+try:
+    import brotli
+
+    BROTLI_SUPPORT = True
+except ImportError:
+    BROTLI_SUPPORT = False
+
+# ---------------------------------------------------------------------------
+# ZSTD SUPPORT (optional — for --compress zstd)
+# ---------------------------------------------------------------------------
+try:
+    import zstandard
+
+    ZSTD_SUPPORT = True
+except ImportError:
+    ZSTD_SUPPORT = False
+
+# ---------------------------------------------------------------------------
+# STAGE PROFILING (opt-in: --profile-stages)
+# ---------------------------------------------------------------------------
+# Workers append one record per file to _FILE_STATS while _PROFILE is set;
+# _run_task ships them back to the parent with each task result. Screening
+# verdicts (see SCREENING) travel the same way in _SCREEN_VERDICTS; _SCREENS
+# is every screen until _init_worker narrows it to the ones switched on.
+_PROFILE = False
+_FILE_STATS = []
+_SCREENS = ("language", "quality")
+_SCREEN_VERDICTS = []
+
+
+class StageProfile:
+    """Wall and CPU seconds per build phase, plus per-file worker records."""
+
+    def __init__(self):
+        self.stages = {}
+        self.files = []
+        self.counters = {}
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - wall0, time.process_time() - cpu0)
+
+    def add(self, name, wall, cpu=0.0):
+        entry = self.stages.setdefault(name, {"wall_s": 0.0, "cpu_s": 0.0})
+        entry["wall_s"] += wall
+        entry["cpu_s"] += cpu
+
+    def worker_phases(self):
+        """Worker seconds summed over files: extraction per format, tokenizing, encoding."""
+        phases = {}
+        for rec in self.files:
+            for key, seconds in (
+                ("screen", rec["screen_s"]),
+                (f"extract {rec['format']}", rec["extract_s"]),
+                ("tokenize", rec["tokenize_s"]),
+                ("encode shard", rec["encode_s"]),
+            ):
+                entry = phases.setdefault(key, {"seconds": 0.0, "files": 0, "bytes_in": 0})
+                entry["seconds"] += seconds
+                entry["files"] += 1
+                entry["bytes_in"] += rec["bytes_in"]
+        return phases
+
+    def report(self):
+        print(f"\n  {'Phase':<28}{'wall s':>10}{'cpu s':>10}")
+        for name, entry in self.stages.items():
+            print(f"  {name:<28}{entry['wall_s']:>10.3f}{entry['cpu_s']:>10.3f}")
+        phases = self.worker_phases()
+        if phases:
+            print(f"\n  {'Worker phase (summed)':<28}{'seconds':>10}{'MB/s':>10}")
+            for name, entry in sorted(phases.items()):
+                mbs = entry["bytes_in"] / entry["seconds"] / 1024 / 1024 if entry["seconds"] else 0
+                print(f"  {name:<28}{entry['seconds']:>10.3f}{mbs:>10.1f}")
+
+    def dump(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "stages": self.stages,
+                    "counters": self.counters,
+                    "worker_phases": self.worker_phases(),
+                    "files": self.files,
+                },
+                f,
+                indent=2,
+            )
+
+
+def _init_worker(profile, screens=_SCREENS):
+    global _PROFILE, _SCREENS
+    _PROFILE = profile
+    _SCREENS = screens
+
+
+class _ChunkTimer:
+    """Chunk iterator wrapper that adds time spent producing chunks to timings["extract"]."""
+
+    def __init__(self, chunks, timings):
+        self.chunks = iter(chunks)
+        self.timings = timings
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        t0 = time.perf_counter()
+        try:
+            return next(self.chunks)
+        finally:
+            self.timings["extract"] = (
+                self.timings.get("extract", 0.0) + time.perf_counter() - t0
+            )
+
+
+def _timed(chunks, timings):
+    return chunks if timings is None else _ChunkTimer(chunks, timings)
+
+
+def _file_stats(filepath, timings, wall, cpu, tokens, encode_s=0.0, **extra):
+    extract_s = timings.get("extract", 0.0)
+    screen_s = timings.get("screen", 0.0)
+    record = {
+        "path": filepath,
+        "format": os.path.splitext(filepath)[1].lower(),
+        "bytes_in": os.path.getsize(filepath),
+        "tokens_out": tokens,
+        "seconds": wall,
+        "cpu_s": cpu,
+        "screen_s": screen_s,
+        "extract_s": extract_s,
+        "tokenize_s": max(wall - screen_s - extract_s - encode_s, 0.0),
+        "encode_s": encode_s,
+    }
+    record.update(extra)
+    _FILE_STATS.append(record)
+
+
 # ---------------------------------------------------------------------------
 # GUTENBERG HEADER/FOOTER STRIPPING
 # ---------------------------------------------------------------------------
@@ -118,7 +284,24 @@ SHARED_WORDS = {
 }
 
 # Regex for Swedish words (including å, ä, ö and common Nordic chars)
-_WORD_RE = re.compile(r"[a-zåäöéèüæøA-ZÅÄÖÉÈÜÆØ]+")
+_WORD_CLASS = "a-zåäöéèüæøA-ZÅÄÖÉÈÜÆØ"
+_WORD_RE = re.compile(f"[{_WORD_CLASS}]+")
+# Anything but a word character or newline (used on "\n"-joined words)
+_NON_WORD_LINE_RE = re.compile(f"[^\n{_WORD_CLASS}]")
+
+# The same class over raw UTF-8: ASCII letters, or one of the two-byte
+# sequences of the extra letters (all of which start with 0xC3). Scanning
+# uses the looser single-byte class, which is much faster; the rare token
+# it over-matches (other 0xC3 letters, stray continuation bytes) is split
+# with the exact pattern afterwards, once per distinct token.
+_EXTRA_LETTERS = "åäöéèüæøÅÄÖÉÈÜÆØ"
+_WORD_BYTES_RE = re.compile(
+    rb"(?:[a-zA-Z]|\xc3["
+    + b"".join(re.escape(c.encode("utf-8")[1:]) for c in _EXTRA_LETTERS)
+    + rb"])+"
+)
+_LOOSE_WORD_BYTES_RE = re.compile(rb"[a-zA-Z\xc3\x80-\xbf]+")
+_NON_WORD_BYTE_RE = re.compile(rb"[^a-zA-Z\xc3\x80-\xbf]")
 
 
 # ---------------------------------------------------------------------------
@@ -130,15 +313,27 @@ def extract_text_txt(filepath):
     return strip_gutenberg_boilerplate(text)
 
 
-def extract_text_pdf(filepath):
+def iter_text_pdf(filepath, start=0, stop=None):
+    doc = fitz.open(filepath)
+    try:
+        for page_no in range(start, doc.page_count if stop is None else stop):
+            yield doc[page_no].get_text()
+    finally:
+        doc.close()
+
+
+def extract_text_pdf(filepath, start=0, stop=None):
     if not PDF_SUPPORT:
         return None
+    return "\n".join(iter_text_pdf(filepath, start, stop))
+
+
+def pdf_page_count(filepath):
     doc = fitz.open(filepath)
-    chunks = []
-    for page in doc:
-        chunks.append(page.get_text())
-    doc.close()
-    return "\n".join(chunks)
+    try:
+        return doc.page_count
+    finally:
+        doc.close()
 
 
 class _StripTagsParser(HTMLParser):
@@ -150,16 +345,18 @@ class _StripTagsParser(HTMLParser):
         self.parts.append(data)
 
 
-def extract_text_epub(filepath):
-    chunks = []
+def iter_text_epub(filepath):
     with zipfile.ZipFile(filepath, "r") as z:
         for name in z.namelist():
             if name.lower().endswith((".html", ".xhtml", ".htm")):
                 raw = z.read(name).decode("utf-8", errors="replace")
                 parser = _StripTagsParser()
                 parser.feed(raw)
-                chunks.append(" ".join(parser.parts))
-    return "\n".join(chunks)
+                yield " ".join(parser.parts)
+
+
+def extract_text_epub(filepath):
+    return "\n".join(iter_text_epub(filepath))
 
 
 HANDLERS = {
@@ -184,35 +381,416 @@ def extract_text(filepath):
 # ---------------------------------------------------------------------------
 # TOKENIZER
 # ---------------------------------------------------------------------------
+STREAM_CHUNK_CHARS = 1 << 20
+MMAP_WINDOW_BYTES = 1 << 20
+
+# Text this close to the end of a chunk may hold the start of a marker
+_MARKER_HOLDBACK = max(map(len, _START_MARKERS + _END_MARKERS))
+# A word running into the end of a chunk
+_TAIL_WORD_RE = re.compile(_WORD_RE.pattern + r"\Z")
+
+
+# Counting is done in two steps: every token goes through Counter's C
+# counting loop unfiltered, then the few entries that must not be counted
+# are deleted once per book. English stopwords that are not also Swedish
+# are looked up directly (O(|_DROP_WORDS|)); over-long tokens take one pass
+# over the book's vocabulary, not over its tokens.
+MAX_WORD_LEN = 40
+_DROP_WORDS = frozenset(ENGLISH_STOPWORDS - SHARED_WORDS)
+
+
+def _count_into(counter, text):
+    """Add raw token counts of text; finish with _drop_filtered."""
+    counter.update(_WORD_RE.findall(text.lower()))
+
+
+def _drop_filtered(counter):
+    for w in _DROP_WORDS.intersection(counter):
+        del counter[w]
+    for w in [w for w in counter if len(w) > MAX_WORD_LEN]:
+        del counter[w]
+    return counter
+
+
 def tokenize_and_count(text):
-    words = _WORD_RE.findall(text.lower())
     counter = Counter()
-    for w in words:
-        if len(w) < 1 or len(w) > 40:
-            continue
-        if w in ENGLISH_STOPWORDS and w not in SHARED_WORDS:
-            continue
-        counter[w] += 1
+    _count_into(counter, text)
+    return _drop_filtered(counter)
+
+
+def count_chunks(chunks):
+    """Count independent chunks (PDF pages, epub documents).
+
+    Returns (counter, n_chars) with n_chars as if the chunks had been joined
+    by newlines.
+    """
+    counter = Counter()
+    n_chars = -1
+    for chunk in chunks:
+        _count_into(counter, chunk)
+        n_chars += len(chunk) + 1
+    return _drop_filtered(counter), max(n_chars, 0)
+
+
+def _find_marker(buf, markers, better_than, pos, stop):
+    """Best-ranked marker among markers[:better_than] starting in buf[pos:stop]."""
+    for rank in range(better_than):
+        idx = buf.find(markers[rank], pos)
+        if idx != -1 and idx < stop:
+            return rank, idx
+    return None
+
+
+def _word_start(buf, pos, cut):
+    """Start of the word running into buf[cut], or cut if there is none."""
+    window = 64
+    while True:
+        lo = max(pos, cut - window)
+        m = _TAIL_WORD_RE.search(buf, lo, cut)
+        if m is None or m.start() > lo or lo == pos:
+            return cut if m is None else m.start()
+        window *= 4
+
+
+def count_text_stream(chunks):
+    """Count a continuous text stream, dropping Gutenberg boilerplate.
+
+    Gives the same result as strip_gutenberg_boilerplate followed by
+    tokenize_and_count on the joined text (short of a start marker on an
+    unterminated last line), while holding only one chunk plus a short
+    carry-over for split words and markers in memory.
+
+    Marker priority is preserved: a higher-priority start marker found later
+    restarts the count, and text after the best end marker seen so far is
+    counted separately and only kept if a higher-priority end marker turns
+    up further on. Returns (counter, n_chars).
+    """
+    kept, kept_chars = Counter(), 0
+    tail, tail_chars = Counter(), 0
+    n_start = len(_START_MARKERS)
+    n_end = len(_END_MARKERS)
+    start_rank, end_rank = n_start, n_end
+    end_piece = ""
+    carry = ""
+    chunks = iter(chunks)
+    eof = False
+    while not eof:
+        chunk = next(chunks, "")
+        eof = not chunk
+        buf = carry + chunk
+        stop = len(buf) if eof else len(buf) - _MARKER_HOLDBACK
+        pos = 0
+
+        while True:
+            hit = _find_marker(buf, _START_MARKERS, start_rank, pos, stop)
+            if hit is None:
+                break
+            rank, idx = hit
+            nl = buf.find("\n", idx)
+            if nl == -1:
+                if not eof:
+                    stop = idx  # wait for the end of the marker line
+                break
+            # A better marker later on the same line (possibly past stop)
+            # starts the body at the same place and must set the rank
+            better = _find_marker(buf, _START_MARKERS, rank, idx + 1, nl)
+            if better is not None:
+                rank = better[0]
+            kept.clear()
+            tail.clear()
+            kept_chars = tail_chars = 0
+            start_rank, end_rank = rank, n_end
+            end_piece = ""
+            pos = nl + 1
+
+        while end_rank:
+            hit = _find_marker(buf, _END_MARKERS, end_rank, pos, stop)
+            if hit is None:
+                break
+            # The body ends at idx, unless a better end marker follows, in
+            # which case the word cut at idx runs on into the tail
+            rank, idx = hit
+            split = _word_start(buf, pos, idx)
+            kept.update(tail)
+            kept_chars += tail_chars
+            _count_into(kept, buf[pos:split])
+            kept_chars += split - pos
+            tail, tail_chars = Counter(), 0
+            end_piece = buf[split:idx]
+            end_rank = rank
+            pos = split
+        if start_rank == 0 and end_rank == 0:
+            break  # nothing can outrank either marker any more
+
+        cut = max(stop, pos)
+        if not eof:
+            cut = _word_start(buf, pos, cut)  # may continue in the next chunk
+        if end_rank == n_end:
+            _count_into(kept, buf[pos:cut])
+            kept_chars += cut - pos
+        else:
+            _count_into(tail, buf[pos:cut])
+            tail_chars += cut - pos
+        carry = buf[cut:]
+    _count_into(kept, end_piece)
+    return _drop_filtered(kept), kept_chars + len(end_piece)
+
+
+def count_text_txt(filepath, timings=None):
+    with open(filepath, "r", encoding="utf-8", errors="replace") as f:
+        chunks = iter(lambda: f.read(STREAM_CHUNK_CHARS), "")
+        return count_text_stream(_timed(chunks, timings))
+
+
+def _find_marker_bytes(buf, markers, start=0):
+    """First occurrence of the highest-priority marker, as in strip_gutenberg_boilerplate."""
+    for marker in markers:
+        idx = buf.find(marker.encode("ascii"), start)
+        if idx != -1:
+            return idx
+    return -1
+
+
+def count_text_mmap(filepath, timings=None):
+    """Count a UTF-8 .txt book straight from a memory map.
+
+    The boilerplate markers are located with mmap.find and the body is
+    scanned as bytes, so neither the boilerplate nor the body is ever
+    decoded; only each distinct token is decoded and lowercased once.
+    Returns (counter, n_chars), n_chars being the body size in bytes.
+    """
+    t0 = time.perf_counter()
+    with open(filepath, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return Counter(), 0
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start, end = 0, len(mm)
+            idx = _find_marker_bytes(mm, _START_MARKERS)
+            if idx != -1:
+                nl = mm.find(b"\n", idx)
+                if nl != -1:
+                    start = nl + 1
+            idx = _find_marker_bytes(mm, _END_MARKERS, start)
+            if idx != -1:
+                end = idx
+            if timings is not None:
+                timings["extract"] = time.perf_counter() - t0
+            # findall over bounded windows, each ending between two words
+            raw = Counter()
+            pos = start
+            while pos < end:
+                m = _NON_WORD_BYTE_RE.search(mm, min(pos + MMAP_WINDOW_BYTES, end), end)
+                stop = m.start() if m else end
+                raw.update(_LOOSE_WORD_BYTES_RE.findall(mm, pos, stop))
+                pos = stop + 1
+
+    return _drop_filtered(_fold_byte_tokens(raw)), end - start
+
+
+def _fold_byte_tokens(raw):
+    """Turn raw byte-token counts into lowercased word counts.
+
+    Usually every distinct token is an exact match, and the whole
+    vocabulary is decoded, lowercased and summed in one go. Otherwise, for
+    example when a book has French letters or stray bytes, each token is
+    checked and re-split on its own.
+    """
+    try:
+        text = b"\n".join(raw).decode("utf-8")
+    except UnicodeDecodeError:
+        text = None
+    if text is not None and not _NON_WORD_LINE_RE.search(text):
+        words = text.lower().split("\n")
+        totals = {}
+        # Case variants fold together: each get sees the previous update
+        totals.update(
+            zip(words, map(int.__add__, raw.values(), map(totals.get, words, itertools.repeat(0))))
+        )
+        return Counter(totals)
+
+    counter = Counter()
+    for token, count in raw.items():
+        if token.isascii() or _WORD_BYTES_RE.fullmatch(token):
+            tokens = (token,)
+        else:
+            tokens = _WORD_BYTES_RE.findall(token)
+        for token in tokens:
+            counter[token.decode("utf-8").lower()] += count
     return counter
 
 
+def count_file(filepath, timings=None):
+    """Tokenize one book without materializing its full text.
+
+    Returns (counter, n_chars), or None if the format is unsupported or the
+    file could not be read. If timings is a dict, the seconds spent reading
+    and extracting text are stored in timings["extract"].
+    """
+    ext = os.path.splitext(filepath)[1].lower()
+    try:
+        if ext == ".txt":
+            try:
+                return count_text_mmap(filepath, timings)
+            except (OSError, ValueError):
+                return count_text_txt(filepath, timings)  # e.g. not mappable
+        if ext == ".pdf" and PDF_SUPPORT:
+            return count_chunks(_timed(iter_text_pdf(filepath), timings))
+        if ext == ".epub":
+            return count_chunks(_timed(iter_text_epub(filepath), timings))
+    except Exception as e:
+        print(f"  [WARN] {os.path.basename(filepath)}: {e}", file=sys.stderr)
+    return None
+
+
+# ---------------------------------------------------------------------------
+# COUNT SHARDS
+# ---------------------------------------------------------------------------
+# A shard is the compact wire and on-disk form of one word count table:
+#
+#   header  "FKS1", count typecode, entry count, vocabulary byte length
+#   vocab   sorted words, UTF-8, joined by "\n"
+#   counts  array of unsigned ints parallel to vocab
+#
+# Workers hand shards (plain bytes) to the parent instead of Counters, so
+# crossing the process boundary is a memcpy rather than a dict pickle.
+_SHARD_HEADER = struct.Struct("<4sc2xII")
+_SHARD_MAGIC = b"FKS1"
+
+
+def encode_shard(counts):
+    words = sorted(counts)
+    try:
+        values = array("I", map(counts.__getitem__, words))
+    except OverflowError:
+        values = array("Q", map(counts.__getitem__, words))
+    blob = "\n".join(words).encode("utf-8")
+    header = _SHARD_HEADER.pack(
+        _SHARD_MAGIC, values.typecode.encode(), len(words), len(blob)
+    )
+    return header + blob + values.tobytes()
+
+
+def decode_shard(data):
+    """Return (words, counts) where counts is an array parallel to words."""
+    magic, typecode, n, blob_len = _SHARD_HEADER.unpack_from(data)
+    if magic != _SHARD_MAGIC:
+        raise ValueError("not a count shard")
+    start = _SHARD_HEADER.size
+    words = data[start : start + blob_len].decode("utf-8").split("\n") if n else []
+    counts = array(typecode.decode())
+    counts.frombytes(data[start + blob_len :])
+    if len(words) != n or len(counts) != n:
+        raise ValueError("truncated count shard")
+    return words, counts
+
+
+def merge_shard_into(totals, data):
+    """Add a shard's counts into the plain dict totals.
+
+    The lookup, add and store all run in C (dict.get via map, int.__add__,
+    dict.update over zip), which beats both Counter.update and a heap-based
+    k-way merge of the sorted vocabularies in CPython.
+    """
+    words, counts = decode_shard(data)
+    totals.update(
+        zip(words, map(int.__add__, counts, map(totals.get, words, itertools.repeat(0))))
+    )
+    return sum(counts)
+
+
 # ---------------------------------------------------------------------------
 # WORKER (runs in child process)
 # ---------------------------------------------------------------------------
-def process_single_file(filepath):
-    text = extract_text(filepath)
-    if not text or len(text) < 100:
+def _screened_out(filepath):
+    """Screen filepath and queue its verdict for the parent; True if rejected."""
+    if not _SCREENS:
+        return False
+    verdict = screen_book(filepath, _SCREENS)
+    if verdict is None:
+        return False
+    _SCREEN_VERDICTS.append((filepath, verdict))
+    return verdict["rejected"] is not None
+
+
+def _cache_digest(filepath, cache_dir, shard=None):
+    """Digest of filepath for the count cache, storing shard under it if given.
+
+    With caching off the file is not hashed and the digest is "". Returns
+    None (with a warning) if the file can no longer be read.
+    """
+    if cache_dir is None:
+        return ""
+    try:
+        digest = file_digest(filepath)
+        if shard is not None:
+            write_shard(digest, shard, cache_dir)
+    except OSError as e:
+        print(f"  [WARN] {os.path.basename(filepath)}: {e}", file=sys.stderr)
         return None
-    counter = tokenize_and_count(text)
-    return (counter, filepath)
+    return digest
+
+
+def process_single_file(filepath, cache_dir=None):
+    """Screen and count one book.
+
+    Returns (shard, filepath, digest), or None if it failed. A screened-out
+    book comes back as (None, filepath, digest) so its verdict can be cached.
+    """
+    timings = {} if _PROFILE else None
+    wall0, cpu0 = time.perf_counter(), time.process_time()
+    rejected = _screened_out(filepath)
+    if timings is not None:
+        timings["screen"] = time.perf_counter() - wall0
+    if rejected:
+        if timings is not None:
+            _file_stats(filepath, timings, time.perf_counter() - wall0,
+                        time.process_time() - cpu0, 0, rejected=True)
+        return (None, filepath, _cache_digest(filepath, cache_dir))
+    result = count_file(filepath, timings)
+    if result is None or result[1] < 100:
+        if timings is not None:
+            _file_stats(filepath, timings, time.perf_counter() - wall0,
+                        time.process_time() - cpu0, 0, failed=True)
+        return None
+    t_encode = time.perf_counter()
+    shard = encode_shard(result[0])
+    encode_s = time.perf_counter() - t_encode
+    if timings is not None:
+        _file_stats(filepath, timings, time.perf_counter() - wall0,
+                    time.process_time() - cpu0, sum(result[0].values()), encode_s)
+    digest = _cache_digest(filepath, cache_dir, shard)
+    if digest is None:
+        return None
+    return (shard, filepath, digest)
+
+
+def count_into_cache(filepath, cache_dir=COUNT_CACHE_DIR):
+    """Count one book straight into the shard cache (download_books.py --count).
+
+    Returns (filepath, digest, words, screen); digest is None if the book had
+    no text, and screen is its screening verdict (None if not screened).
+    The caller records the entry with record_cached().
+    """
+    result = process_single_file(filepath, cache_dir)
+    verdicts = dict(_SCREEN_VERDICTS)
+    del _SCREEN_VERDICTS[:]
+    screen = verdicts.get(filepath)
+    if result is None:
+        return filepath, None, 0, screen
+    shard, _, digest = result
+    if shard is None:
+        return filepath, digest, 0, screen
+    return filepath, digest, sum(decode_shard(shard)[1]), screen
 
 
 # ---------------------------------------------------------------------------
 # FILE DISCOVERY
 # ---------------------------------------------------------------------------
 def collect_files(books_dir, include_legacy=False):
+    """Supported books under books_dir; directories starting with "_" are skipped."""
     files = []
-    for root, _dirs, filenames in os.walk(books_dir):
+    for root, dirs, filenames in os.walk(books_dir):
+        dirs[:] = [d for d in dirs if not d.startswith("_")]
         for name in filenames:
             ext = os.path.splitext(name)[1].lower()
             if ext in HANDLERS:
@@ -225,46 +803,945 @@ def collect_files(books_dir, include_legacy=False):
     return sorted(files)
 
 
+# ---------------------------------------------------------------------------
+# PER-FILE COUNT CACHE
+# ---------------------------------------------------------------------------
+# index.json maps each book path to its size, mtime and content digest; the
+# counts themselves live in shards/<digest>.bin so renamed or duplicated
+# files share one shard. Any change to the tokenizer invalidates everything.
+# Each entry also keeps the book's screening verdict with a fingerprint of
+# the screen settings behind it; switching a screen on or off or retuning
+# it only screens cached books again, without recounting them.
+def _tokenizer_fingerprint():
+    h = hashlib.sha1()
+    h.update(str(COUNT_CACHE_VERSION).encode())
+    h.update(_WORD_RE.pattern.encode("utf-8"))
+    h.update("\n".join(sorted(ENGLISH_STOPWORDS)).encode("utf-8"))
+    h.update("\n".join(sorted(SHARED_WORDS)).encode("utf-8"))
+    return h.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def _screen_fingerprint(screens=_SCREENS):
+    h = hashlib.sha1()
+    h.update(",".join(screens).encode())
+    if "language" in screens:
+        h.update(f"{LANGID_SAMPLE_CHARS}:{LANGID_MIN_WORDS}:{LANGID_MARGIN}".encode())
+        h.update(json.dumps(LANGID_WORDS, sort_keys=True).encode("utf-8"))
+    if "quality" in screens:
+        h.update(json.dumps(QUALITY_LIMITS, sort_keys=True).encode("utf-8"))
+        h.update(f"{QUALITY_SAMPLE_CHARS}:{QUALITY_MIN_WORDS}".encode())
+    return h.hexdigest()
+
+
+def _signature_params():
+    """Settings that near-duplicate signatures depend on (see --dedupe)."""
+    return f"{DEDUPE_SAMPLE_CHARS}:{DEDUPE_MIN_SHINGLES}:{DEDUPE_BINS}"
+
+
+def file_digest(filepath):
+    h = hashlib.sha1()
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def load_count_cache(cache_dir=COUNT_CACHE_DIR):
+    index_path = os.path.join(cache_dir, "index.json")
+    fingerprint = _tokenizer_fingerprint()
+    cache = {"fingerprint": fingerprint, "files": {}, "signatures": {}}
+    if os.path.exists(index_path):
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+            if stored.get("fingerprint") == fingerprint:
+                cache["files"] = stored.get("files", {})
+                if stored.get("signature_params") == _signature_params():
+                    cache["signatures"] = stored.get("signatures", {})
+        except (OSError, ValueError) as e:
+            print(f"  [WARN] Ignoring unreadable count cache: {e}", file=sys.stderr)
+    return cache
+
+
+def save_count_cache(cache, cache_dir=COUNT_CACHE_DIR):
+    """Write the index atomically and drop shards no entry refers to."""
+    files = {p: e for p, e in cache["files"].items() if os.path.exists(p)}
+    cache["files"] = files
+    signatures = {p: e for p, e in cache.get("signatures", {}).items() if os.path.exists(p)}
+    cache["signatures"] = signatures
+    os.makedirs(cache_dir, exist_ok=True)
+    index_path = os.path.join(cache_dir, "index.json")
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "fingerprint": cache["fingerprint"],
+                "files": files,
+                "signature_params": _signature_params(),
+                "signatures": signatures,
+            },
+            f,
+        )
+    os.replace(tmp_path, index_path)
+
+    shard_dir = os.path.join(cache_dir, "shards")
+    if os.path.isdir(shard_dir):
+        live = {f"{e['digest']}.bin" for e in files.values()}
+        for name in os.listdir(shard_dir):
+            if name not in live:
+                os.remove(os.path.join(shard_dir, name))
+
+
+def lookup_cached(cache, filepath, st):
+    """Return the cache entry for filepath if its counts are still valid.
+
+    Size and mtime must match; if only the mtime moved (touch, copy, fresh
+    checkout) the content digest decides.
+    """
+    entry = cache["files"].get(filepath)
+    if entry is None:
+        return None
+    if st.st_size != entry["size"]:
+        return None
+    if st.st_mtime_ns != entry["mtime_ns"]:
+        if file_digest(filepath) != entry["digest"]:
+            return None
+        entry["mtime_ns"] = st.st_mtime_ns
+    return entry
+
+
+def load_shard(digest, cache_dir=COUNT_CACHE_DIR):
+    path = os.path.join(cache_dir, "shards", f"{digest}.bin")
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _shard_size(digest, cache_dir=COUNT_CACHE_DIR):
+    try:
+        return os.path.getsize(os.path.join(cache_dir, "shards", f"{digest}.bin"))
+    except OSError:
+        return 0
+
+
+def write_shard(digest, shard, cache_dir=COUNT_CACHE_DIR):
+    """Store a shard under its content digest (safe to call from workers)."""
+    shard_dir = os.path.join(cache_dir, "shards")
+    os.makedirs(shard_dir, exist_ok=True)
+    path = os.path.join(shard_dir, f"{digest}.bin")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(shard)
+    os.replace(tmp_path, path)
+
+
+def record_cached(cache, filepath, digest, words, st, screen=None, screens=_SCREENS):
+    """Record filepath's counts; screen is its verdict from the given screens.
+
+    The verdict is kept for every screened book, so an unchanged book is
+    neither sampled again nor missing from SCREEN_REPORT. A book screened
+    out before it was counted has no shard and 0 words.
+    """
+    entry = {
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "digest": digest,
+        "words": words,
+        "screen_fp": _screen_fingerprint(tuple(screens)),
+    }
+    if screen is not None:
+        entry["screen"] = screen
+    cache["files"][filepath] = entry
+
+
+# ---------------------------------------------------------------------------
+# NEAR-DUPLICATE DETECTION (--dedupe)
+# ---------------------------------------------------------------------------
+# The same novel often arrives as a Gutenberg .txt, a Litteraturbanken PDF
+# and an IA djvu text. Each book gets a MinHash signature over the word
+# 3-grams of its opening DEDUPE_SAMPLE_CHARS (editions of one text share
+# their first chapters, whatever front matter precedes them), so a PDF
+# costs a few dozen pages of extraction rather than all of them. One hash
+# per 3-gram is split into DEDUPE_BINS bins keeping each bin's minimum
+# (one-permutation hashing). LSH bands of DEDUPE_BAND_ROWS bins propose
+# candidate pairs; pairs agreeing on at least DEDUPE_THRESHOLD of their
+# bins link books into clusters. Within a cluster, books are taken in order
+# of preference (.txt over .epub over .pdf, then the larger file): each is
+# dropped if it is a duplicate of a copy already kept, else kept. Similarity
+# is not transitive, so an anthology overlapping two different books does
+# not make them duplicates of each other.
+DEDUPE_SAMPLE_CHARS = 160_000
+DEDUPE_MIN_SHINGLES = 500
+DEDUPE_BINS = 64
+DEDUPE_BAND_ROWS = 2
+DEDUPE_THRESHOLD = 0.4
+_DEDUPE_FORMAT_RANK = {".txt": 0, ".epub": 1, ".pdf": 2}
+
+
+def _sample_text(filepath, n_chars=DEDUPE_SAMPLE_CHARS):
+    """About the first n_chars of a book's text, without extracting the rest.
+
+    Every format is cut to the same window, so copies compare like for like.
+    """
+    ext = os.path.splitext(filepath)[1].lower()
+    if ext == ".txt":
+        with open(filepath, "r", encoding="utf-8", errors="replace") as f:
+            text = f.read(n_chars + 16384)  # slack for a Gutenberg header
+    else:
+        if ext == ".pdf" and PDF_SUPPORT:
+            chunks = iter_text_pdf(filepath)
+        elif ext == ".epub":
+            chunks = iter_text_epub(filepath)
+        else:
+            return ""
+        parts = []
+        size = 0
+        with contextlib.closing(chunks):
+            for chunk in chunks:
+                parts.append(chunk)
+                size += len(chunk)
+                if size >= n_chars:
+                    break
+        text = "".join(parts)
+    return strip_gutenberg_boilerplate(text)[:n_chars]
+
+
+def book_signature(filepath):
+    """MinHash signature of a book's opening; None if it is too short to judge.
+
+    Empty bins are -1.
+    """
+    words = _WORD_RE.findall(_sample_text(filepath).lower())
+    shingles = set(map(" ".join, zip(words, words[1:], words[2:])))
+    if len(shingles) < DEDUPE_MIN_SHINGLES:
+        return None
+    bins = [-1] * DEDUPE_BINS
+    for shingle in shingles:
+        h = int.from_bytes(
+            hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little"
+        )
+        b = h % DEDUPE_BINS
+        v = h // DEDUPE_BINS
+        if bins[b] < 0 or v < bins[b]:
+            bins[b] = v
+    return bins
+
+
+def _signature_task(filepath):
+    try:
+        return filepath, book_signature(filepath)
+    except Exception as e:
+        print(f"  [WARN] {os.path.basename(filepath)}: {e}", file=sys.stderr)
+        return filepath, None
+
+
+def signature_similarity(a, b):
+    """Estimated Jaccard similarity: the share of bins where both agree."""
+    return sum(1 for x, y in zip(a, b) if x == y and x >= 0) / len(a)
+
+
+def find_near_duplicates(all_files, num_workers, cache=None):
+    """Return {duplicate: (kept, similarity)} for near-duplicate books.
+
+    Signatures are cached in cache["signatures"] by size and mtime.
+    """
+    signatures = {}
+    stored = cache.setdefault("signatures", {}) if cache is not None else {}
+    todo = []
+    for filepath in all_files:
+        st = os.stat(filepath)
+        entry = stored.get(filepath)
+        if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+            signatures[filepath] = entry["sig"]
+        else:
+            todo.append(filepath)
+
+    if todo:
+        with multiprocessing.Pool(processes=num_workers) as pool:
+            for filepath, sig in pool.imap_unordered(_signature_task, todo, chunksize=4):
+                signatures[filepath] = sig
+                st = os.stat(filepath)
+                stored[filepath] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sig": sig}
+
+    # LSH: books sharing any band of bins become candidate pairs
+    buckets = {}
+    for filepath in all_files:
+        sig = signatures.get(filepath)
+        if sig is None:
+            continue
+        for start in range(0, DEDUPE_BINS, DEDUPE_BAND_ROWS):
+            band = tuple(sig[start : start + DEDUPE_BAND_ROWS])
+            if min(band) >= 0:
+                buckets.setdefault((start, band), []).append(filepath)
+
+    parent = {}
+
+    def find(x):
+        while parent.get(x, x) != x:
+            x = parent[x]
+        return x
+
+    checked = set()
+    for members in buckets.values():
+        for i, a in enumerate(members):
+            for b in members[i + 1 :]:
+                if (a, b) in checked:
+                    continue
+                checked.add((a, b))
+                similarity = signature_similarity(signatures[a], signatures[b])
+                if similarity >= DEDUPE_THRESHOLD:
+                    parent[find(a)] = find(b)
+
+    clusters = {}
+    for filepath in set(parent) | set(parent.values()):
+        clusters.setdefault(find(filepath), []).append(filepath)
+
+    duplicates = {}
+    for members in clusters.values():
+        members.sort(
+            key=lambda p: (_DEDUPE_FORMAT_RANK.get(os.path.splitext(p)[1].lower(), 9),
+                           -os.path.getsize(p), p),
+        )
+        kept = []
+        for filepath in members:
+            similarity, keep = max(
+                ((signature_similarity(signatures[filepath], signatures[k]), k) for k in kept),
+                default=(0.0, None),
+            )
+            if similarity >= DEDUPE_THRESHOLD:
+                duplicates[filepath] = (keep, similarity)
+            else:
+                kept.append(filepath)
+    return duplicates
+
+
+# ---------------------------------------------------------------------------
+# LANGUAGE GATE
+# ---------------------------------------------------------------------------
+# IA's language:Swedish metadata is not always right, and a mislabelled
+# English, German, Latin or Danish book would otherwise be counted in full. Workers
+# score the opening of each book against character trigram profiles built
+# from the commonest words of Swedish and of the languages it gets confused
+# with, and skip the book only when another language clearly wins.
+LANGID_SAMPLE_CHARS = 8192
+LANGID_MIN_WORDS = 200
+LANGID_MARGIN = 0.3  # mean log-probability per trigram over Swedish
+LANGID_WORDS = {
+    # Includes pre-1906 spellings (hvad, af, öfver, qv-) so older Swedish
+    # books are not mistaken for Danish
+    "sv": """och i att det som en på är av för med till den har de inte om
+        ett han men var jag sig från vi så kan man när år säger under också
+        efter eller nu sin där vid mot ska skulle kommer ut hon hade blev
+        bli mycket honom henne hans hennes deras vara varit alla andra än
+        hur vad vem vilken dem oss mig dig sitt sina upp ännu icke af
+        öfver hvad hvilken hvar hafva hade qvinna voro äro skall ock sedan
+        någon något många mer mera utan genom hela själf själv dag även""",
+    "da": """og i at det er en til på som de med han af for ikke der var mig
+        sig men et har om vi min havde ham hun nu over da fra du ud sin dem
+        os op man hans hvor eller hvad skal selv her alle vil blev kunne
+        ind når være dog noget ville jo deres efter ned skulle denne end
+        dette mit også under have dig anden hende mine alt meget sit sine
+        vor mod disse hvis din nogle hos blive mange bliver hendes været
+        thi sådan ingen kun hvorfor""",
+    "en": """the of and to a in that is was he for it with as his on be at by
+        i had not are but from or have an they which one you were her all
+        she there would their we him been has when who will more no if out
+        so said what up its about into than them can only other some could
+        time these two may then do first any my now such like our over me
+        even most made after also did many before must through back where
+        much your way well down should because each just those people how""",
+    "de": """der die und in den von zu das mit sich des auf für ist im dem
+        nicht ein eine als auch es an werden aus er hat dass daß sie nach
+        wird bei einer um am sind noch wie einem über einen so zum war
+        haben nur oder aber vor zur bis mehr durch man sein wurde sei ich
+        wir ihr mich dich ihm ihn wenn doch schon kein keine dieser diese
+        dieses welche welcher hatte können konnte sehr unter wieder""",
+    "la": """et in est non ad cum quod ut sed qui quae esse de ex si enim per
+        ab autem hoc nec etiam sunt eius atque vel quam aut nam tamen ita
+        iam inter sic erat fuit ille illa ipse nos vos mihi tibi sibi omnia
+        omnibus quid quibus quo qua unde ubi eorum rerum res deus dominus
+        neque apud post ante contra sine quoque igitur ergo quia""",
+    "fr": """de la le et les des en un une du est que qui dans pour pas au
+        par sur ne se plus il elle ce avec son sa ses mais ou comme tout
+        nous vous ils leur été être avait fait bien sans lui aux cette même
+        dit avoir était je on mon ma mes ces sont peu encore aussi""",
+    "fi": """ja on ei se että hän oli olla ovat mutta kun niin kuin tai jo vain
+        myös sen siitä sitä hänen minä sinä me te he mitä mikä joka jotka
+        ole olisi ollut kanssa koska nyt sitten vielä aina tämä tuo nämä ne
+        jos kaikki itse hyvin paljon mitään ennen jälkeen sinne täällä""",
+}
+
+
+def _trigrams(words):
+    for word in words:
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            yield padded[i : i + 3]
+
+
+def _build_language_profiles():
+    """Per language, log P(trigram) with add-half smoothing over all profiles."""
+    counts = {
+        lang: Counter(_trigrams(text.split())) for lang, text in LANGID_WORDS.items()
+    }
+    vocab = set().union(*counts.values())
+    profiles = {}
+    for lang, grams in counts.items():
+        denom = sum(grams.values()) + 0.5 * len(vocab)
+        profiles[lang] = {gram: math.log((grams[gram] + 0.5) / denom) for gram in vocab}
+    return profiles, vocab
+
+
+_LANG_PROFILES, _LANG_TRIGRAMS = _build_language_profiles()
+
+
+def language_scores(text):
+    """Mean trigram log-probability of text under each language profile.
+
+    Returns (n_words, {lang: score}); only trigrams some profile has seen
+    are scored, so content words do not drown out the function words.
+    """
+    words = _WORD_RE.findall(text.lower())
+    grams = Counter(gram for gram in _trigrams(words) if gram in _LANG_TRIGRAMS)
+    n = sum(grams.values())
+    if not n:
+        return len(words), {}
+    scores = {}
+    for lang, logp in _LANG_PROFILES.items():
+        scores[lang] = sum(count * logp[gram] for gram, count in grams.items()) / n
+    return len(words), scores
+
+
+def language_verdict(text):
+    """Judge a book's opening; None if it is too short to judge.
+
+    Otherwise returns {"lang", "margin", "rejected", "scores"}, where margin
+    is how far the best language scores above Swedish.
+    """
+    n_words, scores = language_scores(text[:LANGID_SAMPLE_CHARS])
+    if n_words < LANGID_MIN_WORDS or not scores:
+        return None
+    best = max(scores, key=scores.get)
+    margin = scores[best] - scores["sv"]
+    return {
+        "lang": best,
+        "margin": round(margin, 3),
+        "rejected": margin >= LANGID_MARGIN,
+        "scores": {lang: round(score, 3) for lang, score in scores.items()},
+    }
+
+
+# ---------------------------------------------------------------------------
+# OCR QUALITY GATE
+# ---------------------------------------------------------------------------
+# Badly OCRed scans (IA _djvu.txt, old Fraktur PDFs) turn every misread word
+# into a new vocabulary entry. A book is rejected when the opening of its
+# text looks like OCR garbage by any of these measures:
+#
+#   dictionary_hits  share of tokens that are common Swedish words
+#   avg_token_len    mean token length (fragments pull it down, lost
+#                    spaces push it up)
+#   fragments        share of 1-2 letter tokens that are not words
+#   non_letter       share of non-space characters that are not letters
+QUALITY_SAMPLE_CHARS = 32768
+QUALITY_MIN_WORDS = 500
+QUALITY_LIMITS = {
+    "dictionary_hits": (0.30, None),
+    "avg_token_len": (2.5, 12.0),
+    "fragments": (None, 0.15),
+    "non_letter": (None, 0.15),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _dictionary_words():
+    return frozenset(SWADESH_SWEDISH) | frozenset(LANGID_WORDS["sv"].split())
+
+
+def quality_verdict(text):
+    """Judge how clean a book's opening text is; None if it is too short.
+
+    Otherwise returns the measures above plus "rejected" (bool) and
+    "failed" (the measures outside QUALITY_LIMITS).
+    """
+    tokens = _WORD_RE.findall(text.lower())
+    n = len(tokens)
+    if n < QUALITY_MIN_WORDS:
+        return None
+    words = _dictionary_words()
+    hits = sum(map(words.__contains__, tokens))
+    fragments = sum(1 for t in tokens if len(t) <= 2 and t not in words)
+    chars = len(text) - sum(map(text.count, " \n\r\t"))
+    letters = sum(map(len, tokens))
+    measures = {
+        "dictionary_hits": hits / n,
+        "avg_token_len": letters / n,
+        "fragments": fragments / n,
+        "non_letter": (chars - letters) / chars if chars else 0.0,
+    }
+    failed = [
+        name
+        for name, (low, high) in QUALITY_LIMITS.items()
+        if (low is not None and measures[name] < low)
+        or (high is not None and measures[name] > high)
+    ]
+    verdict = {name: round(value, 3) for name, value in measures.items()}
+    verdict.update(rejected=bool(failed), failed=failed)
+    return verdict
+
+
+# ---------------------------------------------------------------------------
+# SCREENING
+# ---------------------------------------------------------------------------
+# Workers screen each book on one sample of its opening before counting it,
+# so a rejected book costs a few pages of extraction rather than a full
+# count, and its junk vocabulary never reaches the parent.
+_SCREEN_CHECKS = {"language": language_verdict, "quality": quality_verdict}
+
+
+def screen_book(filepath, screens=_SCREENS):
+    """Run the given screens on a book's opening.
+
+    Returns {screen: verdict, ..., "rejected": name of the first screen
+    that rejected it, or None}; None if the book could not be sampled.
+    """
+    try:
+        text = _sample_text(filepath, max(LANGID_SAMPLE_CHARS, QUALITY_SAMPLE_CHARS))
+    except Exception:
+        return None  # count_file will report it
+    result = {"rejected": None}
+    for name in screens:
+        verdict = _SCREEN_CHECKS[name](text)
+        if verdict is None:
+            continue
+        result[name] = verdict
+        if verdict["rejected"] and result["rejected"] is None:
+            result["rejected"] = name
+    return result if len(result) > 1 else None
+
+
 # ---------------------------------------------------------------------------
 # PARALLEL AGGREGATION
 # ---------------------------------------------------------------------------
-def build_frequency_counter(all_files, num_workers):
-    total_counter = Counter()
+# How per-file counts are reduced into the corpus total:
+#   serial  every file's shard is merged in the parent as it arrives
+#   batch   workers merge a batch of files locally; the parent merges
+#           one shard per batch (a few per worker)
+#   tree    batch shards are merged pairwise across the pool until one
+#           remains, so the parent only decodes the final shard
+REDUCE_STRATEGIES = ("serial", "batch", "tree")
+BATCHES_PER_WORKER = 4
+PDF_PAGES_PER_PART = 50
+
+
+def merge_shards(shards):
+    totals = {}
+    for shard in shards:
+        merge_shard_into(totals, shard)
+    return encode_shard(totals)
+
+
+def schedule_work(items, costs, num_workers):
+    """Pack items into work units, heaviest first.
+
+    Anything at least as heavy as an even share of the work is dispatched
+    alone; the rest is packed greedily into units of about that size, so
+    hundreds of small .txt files travel together while the big PDFs start
+    first and never queue up behind each other in one chunk.
+    """
+    order = sorted(range(len(items)), key=costs.__getitem__, reverse=True)
+    target = max(1, sum(costs) // (num_workers * BATCHES_PER_WORKER))
+    units = []
+    unit, unit_cost = [], 0
+    for i in order:
+        if costs[i] >= target:
+            units.append([items[i]])
+            continue
+        unit.append(items[i])
+        unit_cost += costs[i]
+        if unit_cost >= target:
+            units.append(unit)
+            unit, unit_cost = [], 0
+    if unit:
+        units.append(unit)
+    return units
+
+
+def process_files(task):
+    """Count each file of a work unit separately (serial reduce).
+
+    Files that failed come back as (None, filepath, None), screened-out
+    ones as (None, filepath, digest).
+    """
+    filepaths, cache_dir = task
+    return [
+        process_single_file(filepath, cache_dir) or (None, filepath, None)
+        for filepath in filepaths
+    ]
+
+
+def process_batch(task):
+    """Count a batch of (filepath, cached_digest) items into one shard.
+
+    Items with a cached digest are read from the shard cache; the rest (or
+    cached items whose shard has gone missing) are extracted and counted.
+    Returns the merged shard and, per item, (filepath, digest, words, fresh)
+    with digest None for files that failed and words 0 for screened-out ones.
+    """
+    items, cache_dir = task
+    totals = {}
+    results = []
+    for filepath, digest in items:
+        if digest is not None:
+            try:
+                words = merge_shard_into(totals, load_shard(digest, cache_dir))
+                results.append((filepath, digest, words, False))
+                continue
+            except (OSError, ValueError, struct.error):
+                pass
+        shard, _, digest = process_single_file(filepath, cache_dir) or (None, filepath, None)
+        if shard is None:
+            results.append((filepath, digest, 0, True))
+            continue
+        words = merge_shard_into(totals, shard)
+        results.append((filepath, digest, words, True))
+    return encode_shard(totals), results
+
+
+def plan_pdf_parts(filepaths, num_workers):
+    """Split large pending PDFs into page ranges for different workers.
+
+    Returns {filepath: [(start, stop), ...]} for every PDF with more than
+    PDF_PAGES_PER_PART pages. Opening a PDF only reads its xref table, so
+    doing this in the parent is cheap next to extracting it.
+    """
+    parts = {}
+    if not PDF_SUPPORT or num_workers < 2:
+        return parts
+    for filepath in filepaths:
+        if not filepath.lower().endswith(".pdf"):
+            continue
+        try:
+            n_pages = pdf_page_count(filepath)
+        except Exception:
+            continue  # the regular path will report it
+        if n_pages > PDF_PAGES_PER_PART:
+            parts[filepath] = [
+                (start, min(start + PDF_PAGES_PER_PART, n_pages))
+                for start in range(0, n_pages, PDF_PAGES_PER_PART)
+            ]
+    return parts
+
+
+def screen_only(task):
+    """Screen a book without counting it.
+
+    Used for split PDFs before their page ranges are handed out (see
+    plan_pdf_parts) and for cached books whose screens have changed.
+    Returns (filepath, rejected, digest); digest is that of a screened-out
+    book, for its cache entry.
+    """
+    filepath, cache_dir = task
+    wall0, cpu0 = time.perf_counter(), time.process_time()
+    rejected = _screened_out(filepath)
+    if _PROFILE:
+        wall = time.perf_counter() - wall0
+        _file_stats(filepath, {"screen": wall}, wall, time.process_time() - cpu0, 0,
+                    rejected=rejected)
+    return filepath, rejected, _cache_digest(filepath, cache_dir) if rejected else None
+
+
+def process_pdf_part(task):
+    """Count one page range of a PDF (screened beforehand by screen_only).
+
+    Returns (filepath, start, shard, n_chars, digest); the digest is only
+    computed by the first part, and only when caching, so the file is
+    hashed at most once ("" otherwise). shard is None if the range could
+    not be extracted.
+    """
+    filepath, start, stop, cache_dir = task
+    digest = None
+    if start == 0:
+        digest = ""
+        if cache_dir is not None:
+            try:
+                digest = file_digest(filepath)
+            except OSError as e:
+                print(f"  [WARN] {os.path.basename(filepath)}: {e}", file=sys.stderr)
+                return filepath, start, None, 0, None
+    timings = {} if _PROFILE else None
+    wall0, cpu0 = time.perf_counter(), time.process_time()
+    try:
+        counter, n_chars = count_chunks(_timed(iter_text_pdf(filepath, start, stop), timings))
+    except Exception as e:
+        print(
+            f"  [WARN] {os.path.basename(filepath)} pages {start}-{stop}: {e}",
+            file=sys.stderr,
+        )
+        return filepath, start, None, 0, digest
+    t_encode = time.perf_counter()
+    shard = encode_shard(counter)
+    if timings is not None:
+        _file_stats(filepath, timings, time.perf_counter() - wall0,
+                    time.process_time() - cpu0, sum(counter.values()),
+                    time.perf_counter() - t_encode, pages=[start, stop])
+    return filepath, start, shard, n_chars, digest
+
+
+_TASKS = {
+    "files": process_files,
+    "batch": process_batch,
+    "screen": screen_only,
+    "pdf_part": process_pdf_part,
+}
+
+
+def _run_task(task):
+    kind, arg = task
+    result = _TASKS[kind](arg)
+    file_stats = _FILE_STATS[:]
+    del _FILE_STATS[:]
+    verdicts = _SCREEN_VERDICTS[:]
+    del _SCREEN_VERDICTS[:]
+    return kind, result, file_stats, verdicts
+
+
+def _print_progress(n_done, n_total, n_failed):
+    pct = n_done / n_total * 100
+    bar_len = 30
+    filled = int(bar_len * n_done / n_total)
+    bar = "█" * filled + "░" * (bar_len - filled)
+    print(
+        f"\r  {bar} {pct:5.1f}%  ({n_done}/{n_total}, {n_failed} failed)",
+        end="",
+        flush=True,
+    )
+
+
+def build_frequency_counter(all_files, num_workers, cache=None, reduce="batch", profile=None,
+                            screens=(), verdicts=None):
+    """Count all_files on a pool of num_workers.
+
+    Returns (Counter, book_stats, n_failed). Books are first run through
+    the named screens (see SCREENING); if verdicts is a dict, the verdict
+    for every book screened is stored there by path, including verdicts
+    kept in the cache. Screened-out books are not counted as failed.
+    """
+    if verdicts is None:
+        verdicts = {}
+    totals = {}
     n_done = 0
     n_failed = 0
     n_total = len(all_files)
     book_stats = []
 
     if n_total == 0:
-        return total_counter, book_stats, 0
-
-    chunksize = max(1, n_total // (num_workers * 4))
-
-    with multiprocessing.Pool(processes=num_workers) as pool:
-        for result in pool.imap_unordered(
-            process_single_file, all_files, chunksize=chunksize
+        return Counter(), book_stats, 0
+
+    # Reuse cached counts; only new or modified files need extraction
+    t_lookup = time.perf_counter()
+    cache_dir = COUNT_CACHE_DIR if cache is not None else None
+    screens = tuple(screens)
+    screen_fp = _screen_fingerprint(screens)
+    stats = {}
+    cached = []
+    rescreen = []
+    pending = []
+    for filepath in all_files:
+        stats[filepath] = os.stat(filepath)
+        entry = None
+        if cache is not None:
+            entry = lookup_cached(cache, filepath, stats[filepath])
+        if entry is None:
+            pending.append(filepath)
+            continue
+        if not screens:
+            cached.append((filepath, entry["digest"]))
+            continue
+        if entry.get("screen_fp") != screen_fp:
+            rescreen.append(filepath)  # counts still valid, verdict is not
+            continue
+        screen = entry.get("screen")
+        if screen is not None:
+            verdicts[filepath] = screen
+        if screen is not None and screen["rejected"]:
+            n_done += 1  # still screened out
+        else:
+            cached.append((filepath, entry["digest"]))
+
+    if profile is not None:
+        profile.add("cache lookup", time.perf_counter() - t_lookup)
+    if cache is not None:
+        n_cached = len(cached) + len(rescreen) + n_done
+        print(f"  Cached:   {n_cached} files, {len(pending)} to process\n")
+
+    def record(filepath, digest, words, fresh):
+        nonlocal n_failed
+        verdict = verdicts.get(filepath)
+        if verdict is not None and verdict["rejected"]:
+            if fresh and digest and cache is not None:
+                record_cached(cache, filepath, digest, 0, stats[filepath], verdict, screens)
+            return
+        if digest is None:
+            n_failed += 1
+            return
+        book_stats.append((os.path.basename(filepath), words))
+        if fresh and cache is not None:
+            record_cached(cache, filepath, digest, words, stats[filepath], verdict, screens)
+
+    # Large PDFs are counted page range by page range on several workers
+    # and reassembled here once all of their parts are in
+    pdf_parts = plan_pdf_parts(pending, num_workers)
+    pending = [filepath for filepath in pending if filepath not in pdf_parts]
+    part_state = {}
+    shards = []
+
+    def finish_part(filepath, start, shard, n_chars, digest):
+        state = part_state[filepath]
+        state["left"] -= 1
+        if shard is None:
+            state["chars"] = -1
+        elif state["chars"] >= 0:
+            state["shards"].append(shard)
+            state["chars"] += n_chars
+        if digest is not None:
+            state["digest"] = digest
+        if state["left"]:
+            return False
+        del part_state[filepath]
+        if state["chars"] < 100:
+            record(filepath, None, 0, True)
+            return True
+        file_totals = {}
+        words = sum(merge_shard_into(file_totals, sh) for sh in state["shards"])
+        shard = encode_shard(file_totals)
+        if cache_dir is not None:
+            write_shard(state["digest"], shard, cache_dir)
+        if reduce == "serial":
+            merge_shard_into(totals, shard)
+        else:
+            shards.append(shard)
+        record(filepath, state["digest"], words, True)
+        return True
+
+    # Parent-side merge time vs. time spent waiting on workers
+    merge_wall = merge_cpu = 0.0
+    shard_bytes = 0
+
+    with multiprocessing.Pool(
+        processes=num_workers,
+        initializer=_init_worker,
+        initargs=(profile is not None, screens),
+    ) as pool:
+        # Split PDFs are screened before any of their ranges go out, so a
+        # rejected scan costs a few pages of extraction, not all of them.
+        # Cached books screened with other settings are screened again here
+        # and keep their counts.
+        screen_tasks = [("screen", (filepath, cache_dir)) for filepath in pdf_parts if screens]
+        screen_tasks += [("screen", (filepath, None)) for filepath in rescreen]
+        screened = pool.imap_unordered(_run_task, screen_tasks)
+        for _, (filepath, rejected, digest), file_stats, task_verdicts in screened:
+            if profile is not None:
+                profile.files.extend(file_stats)
+            verdicts.update(task_verdicts)
+            if filepath in pdf_parts:
+                if rejected:
+                    del pdf_parts[filepath]
+                    record(filepath, digest, 0, True)
+                    n_done += 1
+                continue
+            entry = cache["files"][filepath]
+            record_cached(cache, filepath, entry["digest"], entry["words"], stats[filepath],
+                          verdicts.get(filepath), screens)
+            if rejected:
+                n_done += 1
+            else:
+                cached.append((filepath, entry["digest"]))
+        part_tasks = [
+            ("pdf_part", (filepath, start, stop, cache_dir))
+            for filepath, ranges in pdf_parts.items()
+            for start, stop in ranges
+        ]
+        part_state.update(
+            (filepath, {"left": len(ranges), "shards": [], "chars": 0, "digest": None})
+            for filepath, ranges in pdf_parts.items()
+        )
+
+        if reduce == "serial":
+            for filepath, digest in cached:
+                try:
+                    words = merge_shard_into(totals, load_shard(digest, cache_dir))
+                except (OSError, ValueError, struct.error):
+                    pending.append(filepath)
+                    continue
+                record(filepath, digest, words, False)
+                n_done += 1
+
+            costs = [stats[filepath].st_size for filepath in pending]
+            units = schedule_work(pending, costs, num_workers)
+            tasks = [("files", (unit, cache_dir)) for unit in units]
+        else:
+            # A cached file costs about as much as reading its shard
+            items = cached + [(filepath, None) for filepath in pending]
+            costs = [
+                (digest and _shard_size(digest, cache_dir)) or stats[filepath].st_size
+                for filepath, digest in items
+            ]
+            units = schedule_work(items, costs, num_workers)
+            tasks = [("batch", (unit, cache_dir)) for unit in units]
+
+        # PDF parts come from the heaviest books, so they go out first
+        t_pool = time.perf_counter()
+        for kind, result, file_stats, task_verdicts in pool.imap_unordered(
+            _run_task, part_tasks + tasks
         ):
-            n_done += 1
-            if result is None:
-                n_failed += 1
+            wall0, cpu0 = time.perf_counter(), time.process_time()
+            if profile is not None:
+                profile.files.extend(file_stats)
+            verdicts.update(task_verdicts)
+            if kind == "pdf_part":
+                shard_bytes += len(result[2] or b"")
+                n_done += finish_part(*result)
+            elif kind == "files":
+                for shard, filepath, digest in result:
+                    n_done += 1
+                    if shard is None:
+                        record(filepath, digest, 0, True)
+                    else:
+                        shard_bytes += len(shard)
+                        words = merge_shard_into(totals, shard)
+                        record(filepath, digest, words, True)
             else:
-                sub_counter, filepath = result
-                word_count = sum(sub_counter.values())
-                total_counter.update(sub_counter)
-                book_stats.append((os.path.basename(filepath), word_count))
-
-            pct = n_done / n_total * 100
-            bar_len = 30
-            filled = int(bar_len * n_done / n_total)
-            bar = "█" * filled + "░" * (bar_len - filled)
-            print(
-                f"\r  {bar} {pct:5.1f}%  ({n_done}/{n_total}, {n_failed} failed)",
-                end="",
-                flush=True,
-            )
+                shard, results = result
+                shard_bytes += len(shard)
+                shards.append(shard)
+                for file_result in results:
+                    record(*file_result)
+                n_done += len(results)
+            _print_progress(n_done, n_total, n_failed)
+            merge_wall += time.perf_counter() - wall0
+            merge_cpu += time.process_time() - cpu0
+
+        if profile is not None:
+            pool_wall = time.perf_counter() - t_pool
+            profile.add("wait on workers", pool_wall - merge_wall)
+            profile.add("merge (streamed)", merge_wall, merge_cpu)
+            profile.counters["shard_bytes_received"] = shard_bytes
+            profile.counters["tasks"] = len(part_tasks) + len(tasks)
+
+        t_reduce = time.perf_counter(), time.process_time()
+        if reduce == "tree":
+            while len(shards) > 1:
+                pairs = [shards[i : i + 2] for i in range(0, len(shards), 2)]
+                shards = pool.map(merge_shards, pairs)
+        for shard in shards:
+            merge_shard_into(totals, shard)
+        if profile is not None:
+            profile.add(f"merge ({reduce} reduce)", time.perf_counter() - t_reduce[0],
+                        time.process_time() - t_reduce[1])
 
     print()
-    return total_counter, book_stats, n_failed
+    return Counter(totals), book_stats, n_failed
 
 
 # ---------------------------------------------------------------------------
@@ -392,6 +1869,39 @@ def format_short(n):
 # ---------------------------------------------------------------------------
 # HTML RENDERER
 # ---------------------------------------------------------------------------
+# template.html is split once into literal text and {{NAME}} placeholders;
+# rendering fills the placeholders and joins everything in one pass, so the
+# multi-megabyte WORDS_DATA is copied once rather than once per placeholder,
+# and text inside a value is never mistaken for a placeholder.
+_PLACEHOLDER_RE = re.compile(r"\{\{([A-Z0-9_]+)\}\}")
+_TEMPLATE_CACHE = {}  # path -> ((mtime_ns, size), segments)
+
+
+def compile_template(text):
+    """Split text into [literal, name, literal, name, ..., literal]."""
+    return _PLACEHOLDER_RE.split(text)
+
+
+def load_template(path):
+    """Compiled template at path, recompiled only when the file changes."""
+    st = os.stat(path)
+    key = (st.st_mtime_ns, st.st_size)
+    cached = _TEMPLATE_CACHE.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    with open(path, "r", encoding="utf-8") as f:
+        segments = compile_template(f.read())
+    _TEMPLATE_CACHE[path] = (key, segments)
+    return segments
+
+
+def render_template(segments, values):
+    """Fill the placeholders from values; unknown ones are left as they are."""
+    out = segments[:]
+    out[1::2] = [values.get(name, f"{{{{{name}}}}}") for name in segments[1::2]]
+    return "".join(out)
+
+
 def render_html(swadesh_data, total_words, book_count, tier_coverage, site_url=""):
     script_dir = os.path.dirname(os.path.abspath(__file__))
     template_path = os.path.join(script_dir, TEMPLATE_FILE)
@@ -400,8 +1910,7 @@ def render_html(swadesh_data, total_words, book_count, tier_coverage, site_url="
         print(f"ERROR: {TEMPLATE_FILE} not found at {template_path}", file=sys.stderr)
         sys.exit(1)
 
-    with open(template_path, "r", encoding="utf-8") as f:
-        html = f.read()
+    template = load_template(template_path)
 
     # Build the WORDS JSON array
     words_json = json.dumps(swadesh_data, ensure_ascii=False, separators=(",", ":"))
@@ -419,49 +1928,241 @@ def render_html(swadesh_data, total_words, book_count, tier_coverage, site_url="
     tier1_pct = f"{tier_coverage['tier1']:.1f}%"
     tier12_pct = f"{tier_coverage['tier1'] + tier_coverage['tier2']:.1f}%"
 
-    replacements = {
-        "{{WORDS_DATA}}": words_json,
-        "{{TOTAL_WORDS}}": str(total_words),
-        "{{TIER_DATA}}": tier_json,
-        "{{BOOK_COUNT}}": str(book_count),
-        "{{SWADESH_COUNT}}": str(len(swadesh_data)),
-        "{{TOTAL_WORDS_SHORT}}": format_short(total_words),
-        "{{TOTAL_WORDS_DISPLAY}}": f"{total_words:,}",
-        "{{TIER1_PCT}}": tier1_pct,
-        "{{TIER12_PCT}}": tier12_pct,
-        "{{SITE_URL}}": site_url.rstrip("/"),
+    values = {
+        "WORDS_DATA": words_json,
+        "TOTAL_WORDS": str(total_words),
+        "TIER_DATA": tier_json,
+        "BOOK_COUNT": str(book_count),
+        "SWADESH_COUNT": str(len(swadesh_data)),
+        "TOTAL_WORDS_SHORT": format_short(total_words),
+        "TOTAL_WORDS_DISPLAY": f"{total_words:,}",
+        "TIER1_PCT": tier1_pct,
+        "TIER12_PCT": tier12_pct,
+        "SITE_URL": site_url.rstrip("/"),
     }
 
-    for placeholder, value in replacements.items():
-        html = html.replace(placeholder, value)
-
-    return html
+    return render_template(template, values)
 
 
 # ---------------------------------------------------------------------------
 # FREQUENCY TXT OUTPUT
 # ---------------------------------------------------------------------------
-def write_freq_txt(total_counter, book_stats, total_words):
+def count_buckets(counts, top=None):
+    """Yield (count, words) from the highest count down, words sorted within a count.
+
+    Grouping is one pass over the dict and only the distinct counts get
+    sorted: a few thousand, even for millions of words, since most words
+    occur only a handful of times. Ties are listed alphabetically rather
+    than in insertion order, which depends on how the shards were merged,
+    so the same counts always give the same list. With top, stops after
+    that many words; the buckets below are never sorted.
+    """
+    buckets = {}
+    for word, count in counts.items():
+        bucket = buckets.get(count)
+        if bucket is None:
+            buckets[count] = [word]
+        else:
+            bucket.append(word)
+    for count in sorted(buckets, reverse=True):
+        words = sorted(buckets[count])
+        if top is not None:
+            if len(words) >= top:
+                yield count, words[:top]
+                return
+            top -= len(words)
+        yield count, words
+
+
+def open_text_output(path, compress=None):
+    """Open path for writing UTF-8 text through a large buffer.
+
+    compress is None, "gzip" or "zstd"; compressed output gets the matching
+    suffix. Returns (file, path actually written).
+    """
+    if compress is None:
+        return open(path, "w", encoding="utf-8", buffering=WRITE_BUFFER_BYTES), path
+    path += COMPRESSION_SUFFIXES[compress]
+    if compress == "gzip":
+        # Level 1 keeps zlib off the critical path (level 6 is ~5x slower
+        # for ~9% less); the fixed mtime makes output reproducible
+        stream = gzip.GzipFile(path, "wb", compresslevel=1, mtime=0)
+    else:
+        stream = zstandard.ZstdCompressor(level=3).stream_writer(
+            open(path, "wb"), write_return_read=True
+        )
+    # The compressor sees WRITE_BUFFER_BYTES at a time, not every small write
+    buffered = io.BufferedWriter(stream, WRITE_BUFFER_BYTES)
+    return io.TextIOWrapper(buffered, encoding="utf-8"), path
+
+
+def write_freq_txt(total_counter, book_stats, total_words, top=None, compress=None):
+    """Write OUTPUT_FREQ_TXT, most frequent first; only the top words if top is set.
+
+    Returns the path written (with a .gz/.zst suffix if compressed).
+    """
     unique = len(total_counter)
-    with open(OUTPUT_FREQ_TXT, "w", encoding="utf-8") as f:
+    f, path = open_text_output(OUTPUT_FREQ_TXT, compress)
+    with f:
         f.write(f"# Swedish Word Frequency Dictionary\n")
         f.write(f"# Generated from {len(book_stats)} books\n")
         f.write(f"# Total words: {total_words:,}\n")
         f.write(f"# Unique words: {unique:,}\n")
+        if top is not None:
+            f.write(f"# Listed: top {min(top, unique):,} words\n")
         f.write(f"# Format: word\\tfrequency\n")
         f.write(f"#\n")
         f.write(f"# Books analyzed:\n")
         for name, wc in sorted(book_stats):
             f.write(f"#   - {name} ({wc:,} words)\n")
         f.write(f"#\n# {'=' * 50}\n\n")
-        for word, freq in total_counter.most_common():
-            f.write(f"{word}\t{freq}\n")
-    return unique
+        # One join per count bucket instead of one write per word
+        for freq, words in count_buckets(total_counter, top):
+            sep = f"\t{freq}\n"
+            f.write(sep.join(words))
+            f.write(sep)
+    return path
+
+
+# ---------------------------------------------------------------------------
+# PRECOMPRESSED OUTPUTS
+# ---------------------------------------------------------------------------
+# Each output gets .gz (and .br) siblings at maximum compression with the
+# same mtime, for static servers that serve them directly (nginx
+# gzip_static / brotli_static). Brotli at quality 11 runs at well under
+# 1 MB/s, and lower qualities do no better than gzip -9 on word lists, so
+# the word lists only get a .br with --brotli-data. A sibling that still
+# matches its source is kept, so a rebuild only pays for outputs that
+# changed.
+PRECOMPRESS_SUFFIXES = (".gz", ".br")
+
+
+def _sibling_current(out, st, data, decode):
+    """True if out was made from the source with stat st and bytes data.
+
+    Same mtime is enough; otherwise out is decoded and compared, and on a
+    match (the source was rewritten unchanged) gets the source's mtime.
+    """
+    try:
+        if os.stat(out).st_mtime_ns == st.st_mtime_ns:
+            return True
+        with open(out, "rb") as f:
+            if decode(f.read()) != data:
+                return False
+    except Exception:
+        return False  # missing, unreadable or corrupt: write it again
+    os.utime(out, ns=(st.st_atime_ns, st.st_mtime_ns))
+    return True
+
+
+def precompress(path, enabled=True, use_brotli=True):
+    """Write path.gz and path.br next to path; returns {suffix: bytes written}.
+
+    Siblings that still match path are left alone (see _sibling_current).
+    Siblings that are not wanted, because precompression is off or brotli
+    is not wanted or missing, are removed so a server never serves a stale
+    copy.
+    """
+    st = os.stat(path)
+    codecs = {}
+    if enabled:
+        codecs[".gz"] = (functools.partial(gzip.compress, compresslevel=9, mtime=0),
+                         gzip.decompress)
+        if use_brotli and BROTLI_SUPPORT:
+            codecs[".br"] = (functools.partial(brotli.compress, quality=11), brotli.decompress)
+        with open(path, "rb") as f:
+            data = f.read()
+    written = {}
+    for suffix in PRECOMPRESS_SUFFIXES:
+        out = path + suffix
+        if suffix not in codecs:
+            if os.path.exists(out):
+                os.remove(out)
+            continue
+        encode, decode = codecs[suffix]
+        if _sibling_current(out, st, data, decode):
+            continue
+        packed = encode(data)
+        tmp = f"{out}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(packed)
+        os.utime(tmp, ns=(st.st_atime_ns, st.st_mtime_ns))
+        os.replace(tmp, out)
+        written[suffix] = len(packed)
+    return written
+
+
+def remove_stale_siblings(path):
+    """Remove path.gz and path.br if they no longer match path.
+
+    For outputs a build skipped: the file itself is kept, but a server must
+    not serve a copy of an older version. A .br is removed if brotli is not
+    installed to check it.
+    """
+    decoders = {".gz": gzip.decompress}
+    if BROTLI_SUPPORT:
+        decoders[".br"] = brotli.decompress
+    st = os.stat(path)
+    data = None
+    for suffix in PRECOMPRESS_SUFFIXES:
+        out = path + suffix
+        if not os.path.exists(out):
+            continue
+        if data is None:
+            with open(path, "rb") as f:
+                data = f.read()
+        decode = decoders.get(suffix)
+        if decode is None or not _sibling_current(out, st, data, decode):
+            os.remove(out)
 
 
 # ---------------------------------------------------------------------------
 # MAIN
 # ---------------------------------------------------------------------------
+def report_screening(verdicts, quarantine=False):
+    """Print screened-out books, write SCREEN_REPORT and optionally quarantine them."""
+    rejected = sorted(f for f, verdict in verdicts.items() if verdict["rejected"])
+    for name, label in (("language", "Not Swedish"), ("quality", "Poor OCR")):
+        books = [f for f in rejected if verdicts[f]["rejected"] == name]
+        if not books:
+            continue
+        print(f"  {label} (skipped): {len(books)}")
+        for filepath in books[:10]:
+            verdict = verdicts[filepath][name]
+            if name == "language":
+                detail = f"{verdict['lang']}, +{verdict['margin']:.2f}"
+            else:
+                detail = ", ".join(f"{m} {verdict[m]}" for m in verdict["failed"])
+            print(f"            {os.path.basename(filepath)} ({detail})")
+        if len(books) > 10:
+            print(f"            ... see {SCREEN_REPORT}")
+    with open(SCREEN_REPORT, "w", encoding="utf-8") as f:
+        json.dump(dict(sorted(verdicts.items())), f, indent=2)
+
+    if quarantine and rejected:
+        moved = 0
+        for filepath in rejected:
+            rel = os.path.relpath(filepath, BOOKS_DIR)
+            if rel.startswith(os.pardir):
+                continue  # only books/ is quarantined, not the legacy dir
+            dest = os.path.join(BOOKS_DIR, QUARANTINE_DIR, rel)
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            os.replace(filepath, dest)
+            moved += 1
+        print(f"  Quarantined {moved} books in {BOOKS_DIR}/{QUARANTINE_DIR}/")
+
+
+def positive_int(text):
+    """argparse type for counts such as --top: an int of at least 1."""
+    try:
+        value = int(text)
+    except ValueError:
+        value = 0
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive integer, got {text!r}")
+    return value
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Build Swedish word frequency index from books"
@@ -482,15 +2183,101 @@ def main():
         action="store_true",
         help=f"Skip generating {OUTPUT_FREQ_TXT}",
     )
+    parser.add_argument(
+        "--top",
+        type=positive_int,
+        default=None,
+        metavar="N",
+        help=f"Only list the N most frequent words in {OUTPUT_FREQ_TXT} "
+        f"({OUTPUT_FREQ_BIN} always has every word)",
+    )
+    parser.add_argument(
+        "--compress",
+        choices=sorted(COMPRESSION_SUFFIXES),
+        default=None,
+        help=f"Write {OUTPUT_FREQ_TXT} compressed (.gz, or .zst with the zstandard package)",
+    )
+    parser.add_argument(
+        "--no-precompress",
+        action="store_true",
+        help=f"Skip the .gz/.br copies of {OUTPUT_HTML} and the word lists "
+        "(and remove ones left by earlier builds)",
+    )
+    parser.add_argument(
+        "--brotli-data",
+        action="store_true",
+        help="Also write .br copies of the word lists (brotli at quality 11 is slow: "
+        "well under 1 MB/s, redone only when a list changes)",
+    )
+    parser.add_argument(
+        "--no-freq-bin",
+        action="store_true",
+        help=f"Skip generating {OUTPUT_FREQ_BIN} (binary dictionary for freqdict.py)",
+    )
     parser.add_argument(
         "--site-url",
         type=str,
         default="",
         help="Base URL for canonical/OG tags (e.g. https://frekvent.se)",
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"Do not read or write per-file counts in {COUNT_CACHE_DIR}/",
+    )
+    parser.add_argument(
+        "--rebuild-cache",
+        action="store_true",
+        help="Ignore cached per-file counts and re-extract every book",
+    )
+    parser.add_argument(
+        "--reduce",
+        choices=REDUCE_STRATEGIES,
+        default="batch",
+        help="How per-file counts are merged: serial (in the parent), "
+        "batch (pre-merged by workers) or tree (pairwise across the pool) "
+        "(default: batch)",
+    )
+    parser.add_argument(
+        "--dedupe",
+        action="store_true",
+        help="Skip near-duplicate books (the same text from several sources), "
+        f"keeping one copy per group; writes {DEDUPE_REPORT}",
+    )
+    parser.add_argument(
+        "--no-lang-gate",
+        action="store_true",
+        help="Count books even if their opening is clearly not Swedish",
+    )
+    parser.add_argument(
+        "--no-quality-gate",
+        action="store_true",
+        help="Count books even if their opening looks like OCR garbage",
+    )
+    parser.add_argument(
+        "--quarantine",
+        action="store_true",
+        help=f"Move screened-out books to {BOOKS_DIR}/{QUARANTINE_DIR}/ "
+        f"(scores are always written to {SCREEN_REPORT})",
+    )
+    parser.add_argument(
+        "--profile-stages",
+        nargs="?",
+        const=PROFILE_OUTPUT,
+        default=None,
+        metavar="PATH",
+        help="Time each build phase (wall and CPU) and every file, and write "
+        f"the results as JSON (default path: {PROFILE_OUTPUT})",
+    )
     args = parser.parse_args()
+    if args.compress == "zstd" and not ZSTD_SUPPORT:
+        parser.error("--compress zstd needs the zstandard package (pip install zstandard)")
 
     t0 = time.time()
+    profile = StageProfile() if args.profile_stages else None
+
+    def stage(name):
+        return profile.stage(name) if profile else contextlib.nullcontext()
 
     print("=" * 60)
     print("  SWEDISH WORD FREQUENCY BUILDER")
@@ -505,7 +2292,8 @@ def main():
     print(f"  Workers:  {args.workers}")
 
     # Collect files
-    all_files = collect_files(BOOKS_DIR, include_legacy=args.include_legacy)
+    with stage("discovery"):
+        all_files = collect_files(BOOKS_DIR, include_legacy=args.include_legacy)
 
     if not all_files:
         print(f"\n  No books found!")
@@ -529,11 +2317,48 @@ def main():
     type_str = ", ".join(f"{count} {ext}" for ext, count in sorted(type_counts.items()))
     print(f"  Found:    {len(all_files)} files ({type_str})")
 
+    screens = tuple(
+        name
+        for name, off in (("language", args.no_lang_gate), ("quality", args.no_quality_gate))
+        if not off
+    )
+
+    cache = None
+    if not args.no_cache:
+        with stage("load count cache"):
+            cache = load_count_cache()
+        if args.rebuild_cache:
+            cache["files"] = {}
+            cache["signatures"] = {}
+
+    # Near-duplicates (same book from several sources) are counted once
+    if args.dedupe:
+        with stage("dedupe"):
+            duplicates = find_near_duplicates(all_files, args.workers, cache)
+        all_files = [f for f in all_files if f not in duplicates]
+        print(f"  Dedupe:   {len(duplicates)} near-duplicates skipped")
+        for dup, (keep, similarity) in sorted(duplicates.items())[:10]:
+            print(f"            {os.path.basename(dup)} ~ {os.path.basename(keep)} ({similarity:.2f})")
+        if len(duplicates) > 10:
+            print(f"            ... see {DEDUPE_REPORT}")
+        with open(DEDUPE_REPORT, "w", encoding="utf-8") as f:
+            json.dump(
+                {dup: {"kept": keep, "similarity": round(similarity, 3)}
+                 for dup, (keep, similarity) in sorted(duplicates.items())},
+                f,
+                indent=2,
+            )
+
     # Process
     print(f"\n  Processing...\n")
-    total_counter, book_stats, n_failed = build_frequency_counter(
-        all_files, args.workers
-    )
+    verdicts = {}
+    with stage("count (total)"):
+        total_counter, book_stats, n_failed = build_frequency_counter(
+            all_files, args.workers, cache, args.reduce, profile, screens, verdicts
+        )
+    if cache is not None:
+        with stage("save count cache"):
+            save_count_cache(cache)
 
     total_words = sum(total_counter.values())
     unique_words = len(total_counter)
@@ -542,6 +2367,8 @@ def main():
     print(f"\n  Books processed: {n_books}")
     if n_failed:
         print(f"  Failed: {n_failed}")
+    if verdicts:
+        report_screening(verdicts, args.quarantine)
     print(f"  Total words: {total_words:,}")
     print(f"  Unique words: {unique_words:,}")
 
@@ -550,8 +2377,9 @@ def main():
         sys.exit(1)
 
     # Swadesh
-    swadesh_data = build_swadesh_data(total_counter)
-    tier_coverage = compute_tier_coverage(swadesh_data, total_words)
+    with stage("swadesh"):
+        swadesh_data = build_swadesh_data(total_counter)
+        tier_coverage = compute_tier_coverage(swadesh_data, total_words)
 
     found = sum(1 for w in swadesh_data if w["freq"] > 0)
     print(f"  Swadesh words found: {found} / {len(swadesh_data)}")
@@ -559,19 +2387,65 @@ def main():
 
     # Generate HTML
     print(f"\n  Generating {OUTPUT_HTML}...")
-    html = render_html(swadesh_data, total_words, n_books, tier_coverage, args.site_url)
+    with stage("render_html"):
+        html = render_html(swadesh_data, total_words, n_books, tier_coverage, args.site_url)
 
     script_dir = os.path.dirname(os.path.abspath(__file__))
     output_path = os.path.join(script_dir, OUTPUT_HTML)
-    with open(output_path, "w", encoding="utf-8") as f:
+    with stage("write html"), open(output_path, "w", encoding="utf-8") as f:
         f.write(html)
 
     # Optional: frequency txt
+    produced = set()
+    if not args.no_freq_txt:
+        print(f"  Generating {OUTPUT_FREQ_TXT}{COMPRESSION_SUFFIXES.get(args.compress, '')}...")
+        with stage("write_freq_txt"):
+            produced.add(
+                write_freq_txt(total_counter, book_stats, total_words, args.top, args.compress)
+            )
+    if not args.no_freq_bin:
+        print(f"  Generating {OUTPUT_FREQ_BIN}...")
+        with stage("write_freq_bin"):
+            write_freq_dict(total_counter, OUTPUT_FREQ_BIN, total_words)
+        produced.add(OUTPUT_FREQ_BIN)
+
+    # A word list written in one format replaces the others (a compressed
+    # one also replaces the plain list's .gz/.br copies). Outputs skipped
+    # this time are left alone, except for copies that no longer match them.
     if not args.no_freq_txt:
-        print(f"  Generating {OUTPUT_FREQ_TXT}...")
-        write_freq_txt(total_counter, book_stats, total_words)
+        replaced = set(COMPRESSION_SUFFIXES.values())
+        if args.compress:
+            replaced.update(("", *PRECOMPRESS_SUFFIXES))
+        else:
+            replaced.difference_update(PRECOMPRESS_SUFFIXES)  # precompress() owns these
+        for suffix in sorted(replaced):
+            path = OUTPUT_FREQ_TXT + suffix
+            if path not in produced and os.path.exists(path):
+                os.remove(path)
+    for path in (OUTPUT_FREQ_TXT, OUTPUT_FREQ_BIN):
+        if path not in produced and os.path.exists(path):
+            remove_stale_siblings(path)
+    data_outputs = [path for path in (OUTPUT_FREQ_TXT, OUTPUT_FREQ_BIN) if path in produced]
+
+    # Precompressed copies for static servers (gzip_static / brotli_static)
+    with stage("precompress"):
+        for path in [output_path] + data_outputs:
+            written = precompress(path, enabled=not args.no_precompress,
+                                  use_brotli=path == output_path or args.brotli_data)
+            if written:
+                sizes = ", ".join(f"{suffix} {size / 1024:,.0f} KB" for suffix, size in written.items())
+                print(f"  Precompressed {os.path.basename(path)} ({sizes})")
+    if not args.no_precompress and not BROTLI_SUPPORT:
+        print("  No .br copies (pip install brotli to enable)")
 
     elapsed = time.time() - t0
+    if profile is not None:
+        profile.counters.update(
+            files=len(all_files), books=n_books, tokens=total_words, unique_words=unique_words
+        )
+        profile.report()
+        profile.dump(args.profile_stages)
+        print(f"\n  Stage profile written to {args.profile_stages}")
     print(f"\n  Done in {elapsed:.1f}s!")
     print(f"  Open {OUTPUT_HTML} in your browser.")
     print("=" * 60)
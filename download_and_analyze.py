@@ -4,6 +4,7 @@ Download Swedish ebooks and build a word frequency dictionary.
 Cross-reference with the Swadesh 207-word list for Swedish.
 """
 
+import argparse
 import os
 import re
 import time
@@ -12,6 +13,14 @@ import requests
 from collections import Counter
 from urllib.parse import urljoin
 
+from build import (
+    COMPRESSION_SUFFIXES,
+    ZSTD_SUPPORT,
+    count_buckets,
+    open_text_output,
+    positive_int,
+)
+
 # ---------------------------------------------------------------------------
 # CONFIG
 # ---------------------------------------------------------------------------
@@ -267,6 +276,15 @@ SWADESH_SWEDISH = {
 # MAIN
 # ---------------------------------------------------------------------------
 def main():
+    parser = argparse.ArgumentParser(description="Download Swedish ebooks and count their words")
+    parser.add_argument("--top", type=positive_int, default=None, metavar="N",
+                        help=f"Only save the N most frequent words to {OUTPUT_FILE}")
+    parser.add_argument("--compress", choices=sorted(COMPRESSION_SUFFIXES), default=None,
+                        help=f"Write {OUTPUT_FILE} compressed (.gz, or .zst with zstandard)")
+    args = parser.parse_args()
+    if args.compress == "zstd" and not ZSTD_SUPPORT:
+        parser.error("--compress zstd needs the zstandard package (pip install zstandard)")
+
     print("=" * 60)
     print("SWEDISH EBOOK WORD FREQUENCY ANALYZER")
     print("=" * 60)
@@ -303,12 +321,15 @@ def main():
     print(f"📊 Unique words: {unique_words:,}")
 
     # --- Phase 3: Save full frequency dictionary ---
-    print(f"\n💾 Saving frequency dictionary to {OUTPUT_FILE}...")
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
+    out, output_path = open_text_output(OUTPUT_FILE, args.compress)
+    print(f"\n💾 Saving frequency dictionary to {output_path}...")
+    with out as f:
         f.write(f"# Swedish Word Frequency Dictionary\n")
         f.write(f"# Generated from {len(downloaded_files)} Swedish ebooks\n")
         f.write(f"# Total words: {total_words:,}\n")
         f.write(f"# Unique words: {unique_words:,}\n")
+        if args.top is not None:
+            f.write(f"# Listed: top {min(args.top, unique_words):,} words\n")
         f.write(f"# Format: word<TAB>frequency\n")
         f.write(f"#\n")
         f.write(f"# Books analyzed:\n")
@@ -317,10 +338,13 @@ def main():
         f.write(f"#\n")
         f.write(f"# {'='*50}\n\n")
 
-        for word, freq in total_counter.most_common():
-            f.write(f"{word}\t{freq}\n")
+        for freq, words in count_buckets(total_counter, args.top):
+            sep = f"\t{freq}\n"
+            f.write(sep.join(words))
+            f.write(sep)
 
-    print(f"  ✅ Saved {unique_words:,} entries")
+    saved = unique_words if args.top is None else min(args.top, unique_words)
+    print(f"  ✅ Saved {saved:,} entries")
 
     # --- Phase 4: Swadesh cross-reference ---
     print(f"\n🔤 Cross-referencing with Swadesh list ({len(SWADESH_SWEDISH)} entries)...\n")
@@ -399,7 +423,7 @@ def main():
         print(f"  {rank:>3}. {word:<15} {freq:>10,}{tag}")
 
     print(f"\n🎉 Done! Check these files:")
-    print(f"   📄 {OUTPUT_FILE} — Full frequency dictionary ({unique_words:,} words)")
+    print(f"   📄 {output_path} — Full frequency dictionary ({unique_words:,} words)")
     print(f"   📄 {SWADESH_OUTPUT} — Swadesh learning priority guide")
 
 
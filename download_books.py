@@ -13,119 +13,539 @@ Usage:
     python download_books.py              # download all ~2000
     python download_books.py --limit 500  # download first 500
     python download_books.py --skip-pdf   # skip PDFs (faster, text only)
+    python download_books.py --workers 8  # 8 downloads in flight
+    python download_books.py --host-limit archive.org=2:3  # 2 req/s, 3 at once
+    python download_books.py --engine async --workers 32  # one event loop
+    python download_books.py --count      # tokenize books as they arrive
 """
 
 import argparse
+import asyncio
+import glob
+import hashlib
 import json
+import multiprocessing
 import os
 import re
 import sys
+import threading
 import time
 import concurrent.futures
+from urllib.parse import urlencode, urlparse
+
 import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import aiohttp
+    ASYNC_SUPPORT = True
+except ImportError:
+    ASYNC_SUPPORT = False
 
 BOOKS_DIR = "books"
-DOWNLOAD_LOG = "books/_download_log.json"
+DOWNLOAD_JOURNAL = "books/_download_log.jsonl"
+LEGACY_DOWNLOAD_LOG = "books/_download_log.json"  # migrated into the journal
+METADATA_CACHE_DIR = ".http_cache"
+# Overridable (--gutenberg-url, --archive-url), e.g. to point at a local stand-in
+GUTENBERG_URL = "https://www.gutenberg.org"
+ARCHIVE_URL = "https://archive.org"
 USER_AGENT = "LearnSvenska/1.0 (educational project; Swedish word frequency analysis)"
 SESSION = None
+METADATA_CACHE = None  # MetadataCache, set up in main()
+
+
+# ---------------------------------------------------------------------------
+# PER-HOST POLITENESS (token bucket per host + connection cap)
+# ---------------------------------------------------------------------------
+# host suffix -> (requests per second, max concurrent downloads)
+HOST_LIMITS = {
+    "gutenberg.org": (2.0, 2),
+    "archive.org": (4.0, 4),
+}
+DEFAULT_HOST_LIMIT = (1.0, 2)
+
+
+class TokenBucket:
+    """Thread-safe token bucket; each request reserves one token."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """Take a token and return how long to wait before using it.
+
+        Tokens may go negative, which queues callers in arrival order.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+    def acquire(self):
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+
+class HostLimit:
+    def __init__(self, host, rate, max_conn):
+        self.host = host
+        self.rate = rate
+        self.max_conn = max(max_conn, 1)
+        self.bucket = TokenBucket(rate)
+        self.in_flight = 0  # owned by the download engine's main loop
+
+
+_HOST_LIMITERS = {}
+_HOST_LIMITERS_LOCK = threading.Lock()
+
+
+def host_limit(host):
+    """The HostLimit for a hostname, matched by suffix against HOST_LIMITS.
+
+    www.gutenberg.org and ia800.us.archive.org share their domain's limit;
+    the longest matching suffix wins, so a --host-limit for a subdomain
+    overrides its domain's.
+    """
+    host = (host or "").lower()
+    matches = [k for k in HOST_LIMITS if host == k or host.endswith("." + k)]
+    key = max(matches, key=len) if matches else host
+    with _HOST_LIMITERS_LOCK:
+        if key not in _HOST_LIMITERS:
+            rate, max_conn = HOST_LIMITS.get(key, DEFAULT_HOST_LIMIT)
+            _HOST_LIMITERS[key] = HostLimit(key, rate, max_conn)
+        return _HOST_LIMITERS[key]
 
 
-def get_session():
+def parse_host_limit(text):
+    """'gutenberg.org=1.5:2' -> ('gutenberg.org', 1.5, 2); ':CONN' is optional."""
+    try:
+        host, spec = text.split("=", 1)
+        rate, _, max_conn = spec.partition(":")
+        rate = float(rate)
+        max_conn = int(max_conn) if max_conn else DEFAULT_HOST_LIMIT[1]
+        if not host or rate <= 0 or max_conn < 1:
+            raise ValueError
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected HOST=REQ_PER_SEC[:MAX_CONN], got {text!r}")
+    return host.lower(), rate, max_conn
+
+
+class PoliteSession(requests.Session):
+    """Session that waits for the target host's token before every request.
+
+    send() also runs for each redirect hop, so a redirect to an archive.org
+    data node is paced too.
+    """
+
+    def send(self, request, **kwargs):
+        host_limit(urlparse(request.url).hostname).bucket.acquire()
+        return super().send(request, **kwargs)
+
+
+def get_session(pool_size=10):
+    """Shared session; the first call sizes its per-host connection pool.
+
+    Worker threads all use this one session so connections are reused.
+    """
     global SESSION
     if SESSION is None:
-        SESSION = requests.Session()
+        SESSION = PoliteSession()
         SESSION.headers["User-Agent"] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(pool_size, 10))
+        SESSION.mount("https://", adapter)
+        SESSION.mount("http://", adapter)
     return SESSION
 
 
 # ---------------------------------------------------------------------------
 # LOGGING (track what we've downloaded to enable resume)
 # ---------------------------------------------------------------------------
-def load_log():
-    if os.path.exists(DOWNLOAD_LOG):
-        with open(DOWNLOAD_LOG, "r") as f:
-            return json.load(f)
-    return {"downloaded": [], "failed": []}
+# One JSON line per finished item, appended and flushed as results arrive,
+# so a crash loses at most the line being written. On startup the journal
+# is folded into sets and rewritten with one line per item.
+class DownloadLog:
+    def __init__(self, path=DOWNLOAD_JOURNAL):
+        self.path = path
+        self.downloaded = set()
+        self.failed = set()
+        self._file = None
+
+    def _apply(self, key, status):
+        if status == "downloaded":
+            self.downloaded.add(key)
+            self.failed.discard(key)
+        elif key not in self.downloaded:
+            self.failed.add(key)
+
+    def load(self):
+        """Replay the journal (and a legacy JSON log), then compact it."""
+        if os.path.exists(LEGACY_DOWNLOAD_LOG):
+            with open(LEGACY_DOWNLOAD_LOG, "r") as f:
+                legacy = json.load(f)
+            for key in legacy.get("failed", []):
+                self._apply(key, "failed")
+            for key in legacy.get("downloaded", []):
+                self._apply(key, "downloaded")
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line from a crash
+                    self._apply(entry["key"], entry["status"])
+        self.compact()
+        if os.path.exists(LEGACY_DOWNLOAD_LOG):
+            os.remove(LEGACY_DOWNLOAD_LOG)
+        return self
+
+    def compact(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for status, keys in (("failed", self.failed), ("downloaded", self.downloaded)):
+                for key in sorted(keys):
+                    f.write(json.dumps({"key": key, "status": status}) + "\n")
+        os.replace(tmp, self.path)
+
+    def record(self, key, ok):
+        """Append one result and flush it to the OS straight away."""
+        status = "downloaded" if ok else "failed"
+        self._apply(key, status)
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps({"key": key, "status": status, "t": int(time.time())}) + "\n")
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+# ---------------------------------------------------------------------------
+# METADATA CACHE (catalog, search and IA file-list responses)
+# ---------------------------------------------------------------------------
+# Each response is kept in METADATA_CACHE_DIR with its ETag/Last-Modified.
+# Within the TTL it is reused without a request; after that it is
+# revalidated with a conditional GET, so an unchanged answer costs a 304.
+class MetadataCache:
+    def __init__(self, cache_dir=METADATA_CACHE_DIR, ttl=0):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.stats = {"fresh": 0, "revalidated": 0, "fetched": 0}
+        self.lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(url, params=None):
+        return f"{url}?{urlencode(params)}" if params else url
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".json")
 
+    def lookup(self, key):
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get("key") == key else None
+
+    def is_fresh(self, entry):
+        return time.time() - entry["fetched"] < self.ttl
+
+    @staticmethod
+    def conditional_headers(entry):
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def count(self, outcome):
+        with self.lock:
+            self.stats[outcome] += 1
 
-def save_log(log):
-    with open(DOWNLOAD_LOG, "w") as f:
-        json.dump(log, f, indent=2)
+    def store(self, key, body, headers):
+        """Keep a 200 body if the server gave a validator or a TTL applies."""
+        self.count("fetched")
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if etag or last_modified or self.ttl:
+            self._write({
+                "key": key,
+                "etag": etag,
+                "last_modified": last_modified,
+                "fetched": time.time(),
+                "body": body,
+            })
+
+    def touch(self, entry):
+        """A 304 confirmed entry; restart its TTL."""
+        self.count("revalidated")
+        entry["fetched"] = time.time()
+        self._write(entry)
+
+    def _write(self, entry):
+        path = self._path(entry["key"])
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp, path)
+
+
+def get_metadata(url, params=None, timeout=30):
+    """GET a catalog, search or file-list URL through METADATA_CACHE.
+
+    Returns the body text; raises on network errors and non-200 answers.
+    """
+    cache = METADATA_CACHE
+    key = MetadataCache.key(url, params)
+    entry = cache.lookup(key) if cache else None
+    if entry is not None and cache.is_fresh(entry):
+        cache.count("fresh")
+        return entry["body"]
+    resp = get_session().get(
+        url, params=params, headers=MetadataCache.conditional_headers(entry), timeout=timeout
+    )
+    if resp.status_code == 304 and entry is not None:
+        cache.touch(entry)
+        return entry["body"]
+    if resp.status_code != 200:
+        raise requests.HTTPError(f"{resp.status_code} for {resp.url}", response=resp)
+    if cache:
+        cache.store(key, resp.text, resp.headers)
+    return resp.text
+
+
+# ---------------------------------------------------------------------------
+# DOWNLOAD HELPERS
+# ---------------------------------------------------------------------------
+def have_file(path, min_size):
+    return os.path.exists(path) and os.path.getsize(path) > min_size
+
+
+def _remove(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def part_path(path, url):
+    """Where a download of url into path accumulates until it is complete.
+
+    Keyed by URL, so a partial file is only ever resumed from its own source
+    (Gutenberg and IA try several URLs for the same book).
+    """
+    tag = hashlib.sha1(url.encode("utf-8")).hexdigest()[:10]
+    return f"{path}.{tag}.part"
+
+
+# Next to every part file, part.json records the validator and total size
+# of the response it was started from. A resume sends the validator as
+# If-Range, so a re-released file comes back whole (200) instead of being
+# spliced onto the old part, and a 206 must report the same total size.
+def _validator(headers):
+    """A strong validator for If-Range: the ETag, else Last-Modified."""
+    etag = headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return headers.get("Last-Modified")
+
+
+def _write_part_meta(part, headers):
+    size = headers.get("Content-Length")
+    meta = {"validator": _validator(headers), "size": int(size) if size else None}
+    with open(part + ".json", "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+
+def _discard_part(part):
+    _remove(part)
+    _remove(part + ".json")
+
+
+def _resume_point(part):
+    """(offset, meta) to continue part from.
+
+    A part whose source gave no validator cannot be told apart from a
+    changed file, so it is dropped and the download starts over.
+    """
+    offset = os.path.getsize(part) if os.path.exists(part) else 0
+    meta = {}
+    if offset:
+        try:
+            with open(part + ".json", "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            pass
+        if not meta.get("validator"):
+            _discard_part(part)
+            return 0, {}
+    return offset, meta
+
+
+def _range_headers(offset, validator=None):
+    # identity: byte offsets must refer to the file, not a gzip stream of it
+    headers = {"Accept-Encoding": "identity"}
+    if offset:
+        headers["Range"] = f"bytes={offset}-"
+        headers["If-Range"] = validator
+    return headers
+
+
+def _resume_mode(status, content_range, offset, size=None):
+    """How to treat a response to a (possibly ranged) download request.
+
+    "ab" appends to the part file, "wb" rewrites it, "done" means the part
+    already holds the whole file, None means give up on this part. size is
+    the total the part was started with, if known; a range of a file of any
+    other size is refused.
+    """
+    content_range = content_range or ""
+    total = content_range.rpartition("/")[2]
+    if status == 200:
+        return "wb"  # full body: the server ignores Range, or If-Range failed
+    if size is not None and total != str(size):
+        return None
+    if status == 206 and offset and content_range.startswith(f"bytes {offset}-"):
+        return "ab"
+    if status == 416 and offset and content_range == f"bytes */{offset}":
+        return "done"
+    return None
+
+
+def _finish_part(part, path, min_size):
+    """Atomically move a complete part file into place if it is big enough.
+
+    Once path is in place, parts left by the book's other URLs are removed.
+    """
+    if os.path.getsize(part) > min_size:
+        os.replace(part, path)
+        for stale in glob.glob(glob.escape(path) + ".*.part*"):
+            _remove(stale)
+        return True
+    _discard_part(part)
+    return False
+
+
+def download_to(url, path, min_size, timeout=120):
+    """Stream url into path through a .part file, resuming it with Range.
+
+    path only appears, by rename, once the body is complete and larger than
+    min_size. After a network error the part file is kept, so the next
+    attempt (or run) continues where this one stopped, provided the file
+    has not changed upstream since.
+    """
+    s = get_session()
+    part = part_path(path, url)
+    for _ in range(2):
+        offset, meta = _resume_point(part)
+        headers = _range_headers(offset, meta.get("validator"))
+        try:
+            with s.get(url, headers=headers, timeout=timeout, stream=True) as resp:
+                mode = _resume_mode(resp.status_code, resp.headers.get("Content-Range"),
+                                    offset, meta.get("size"))
+                if mode == "done":
+                    return _finish_part(part, path, min_size)
+                if mode is None:
+                    _discard_part(part)
+                    if offset:
+                        continue  # stale or unresumable part: start over once
+                    return False
+                if mode == "wb":
+                    _write_part_meta(part, resp.headers)
+                with open(part, mode) as f:
+                    for chunk in resp.iter_content(chunk_size=65536):
+                        f.write(chunk)
+        except Exception:
+            return False
+        return _finish_part(part, path, min_size)
+    return False
+
+
+def search_ids(data):
+    """Identifiers from an Internet Archive advancedsearch JSON response."""
+    return [d["identifier"] for d in data.get("response", {}).get("docs", [])]
 
 
 # ---------------------------------------------------------------------------
 # SOURCE 1: PROJECT GUTENBERG (~200 Swedish books as .txt)
 # ---------------------------------------------------------------------------
+def gutenberg_catalog_url():
+    return f"{GUTENBERG_URL}/browse/languages/sv"
+
+
+def parse_gutenberg_ids(html):
+    # Extract ebook IDs from href="/ebooks/NNNNN"
+    ids = sorted(int(i) for i in set(re.findall(r'/ebooks/(\d+)', html)))
+    print(f"    Found {len(ids)} Swedish books on Gutenberg")
+    return ids
+
+
+def gutenberg_book_urls(book_id):
+    return [
+        f"{GUTENBERG_URL}/cache/epub/{book_id}/pg{book_id}.txt",
+        f"{GUTENBERG_URL}/files/{book_id}/{book_id}-0.txt",
+        f"{GUTENBERG_URL}/ebooks/{book_id}.txt.utf-8",
+    ]
+
+
 def fetch_gutenberg_swedish_ids():
     """Scrape the Gutenberg Swedish catalog page for book IDs."""
     print("  Fetching Project Gutenberg Swedish catalog...")
-    s = get_session()
-
     try:
-        resp = s.get(
-            "https://www.gutenberg.org/browse/languages/sv",
-            timeout=30,
-        )
-        resp.raise_for_status()
+        html = get_metadata(gutenberg_catalog_url(), timeout=30)
     except Exception as e:
         print(f"    [WARN] Could not fetch Gutenberg catalog: {e}")
         return []
-
-    # Extract ebook IDs from href="/ebooks/NNNNN"
-    ids = list(set(re.findall(r'/ebooks/(\d+)', resp.text)))
-    ids = [int(i) for i in ids]
-    print(f"    Found {len(ids)} Swedish books on Gutenberg")
-    return sorted(ids)
+    return parse_gutenberg_ids(html)
 
 
 def download_gutenberg_book(book_id, books_dir):
     """Download a single Gutenberg book as .txt."""
     filename = os.path.join(books_dir, f"gutenberg_{book_id}.txt")
-    if os.path.exists(filename) and os.path.getsize(filename) > 500:
+    if have_file(filename, 500):
         return filename  # already downloaded
 
-    s = get_session()
-    urls = [
-        f"https://www.gutenberg.org/cache/epub/{book_id}/pg{book_id}.txt",
-        f"https://www.gutenberg.org/files/{book_id}/{book_id}-0.txt",
-        f"https://www.gutenberg.org/ebooks/{book_id}.txt.utf-8",
-    ]
-
-    for url in urls:
-        try:
-            resp = s.get(url, timeout=30)
-            if resp.status_code == 200 and len(resp.content) > 500:
-                with open(filename, "wb") as f:
-                    f.write(resp.content)
-                return filename
-        except Exception:
-            continue
+    for url in gutenberg_book_urls(book_id):
+        if download_to(url, filename, 500, timeout=30):
+            return filename
     return None
 
 
 # ---------------------------------------------------------------------------
 # SOURCE 2: INTERNET ARCHIVE — LITTERATURBANKEN (~618 PDFs)
 # ---------------------------------------------------------------------------
+LITTBANK_SEARCH = {
+    "q": "identifier:arkivkopia.se-littbank*",
+    "fl[]": "identifier",
+    "rows": "1000",
+    "output": "json",
+}
+
+
+def littbank_pdf(identifier, books_dir):
+    """(url, local path) of a Litteraturbanken item's PDF."""
+    filename_part = identifier.replace("arkivkopia.se-littbank-", "")
+    url = f"{ARCHIVE_URL}/download/{identifier}/{filename_part}.pdf"
+    return url, os.path.join(books_dir, f"littbank_{filename_part}.pdf")
+
+
 def fetch_litteraturbanken_ids():
     """Query Internet Archive for the Litteraturbanken collection."""
     print("  Fetching Litteraturbanken collection from Internet Archive...")
-    s = get_session()
-
     try:
-        resp = s.get(
-            "https://archive.org/advancedsearch.php",
-            params={
-                "q": "identifier:arkivkopia.se-littbank*",
-                "fl[]": "identifier",
-                "rows": "1000",
-                "output": "json",
-            },
-            timeout=60,
-        )
-        resp.raise_for_status()
-        data = resp.json()
-        docs = data.get("response", {}).get("docs", [])
-        ids = [d["identifier"] for d in docs]
+        data = json.loads(get_metadata(f"{ARCHIVE_URL}/advancedsearch.php", LITTBANK_SEARCH, 60))
+        ids = search_ids(data)
         print(f"    Found {len(ids)} Litteraturbanken items")
         return ids
     except Exception as e:
@@ -135,100 +555,62 @@ def fetch_litteraturbanken_ids():
 
 def download_litteraturbanken_pdf(identifier, books_dir):
     """Download a Litteraturbanken PDF from Internet Archive."""
-    filename_part = identifier.replace("arkivkopia.se-littbank-", "")
-    filepath = os.path.join(books_dir, f"littbank_{filename_part}.pdf")
-    if os.path.exists(filepath) and os.path.getsize(filepath) > 1000:
+    url, filepath = littbank_pdf(identifier, books_dir)
+    if have_file(filepath, 1000):
+        return filepath
+    if download_to(url, filepath, 1000):
         return filepath
-
-    url = f"https://archive.org/download/{identifier}/{filename_part}.pdf"
-    s = get_session()
-    try:
-        resp = s.get(url, timeout=120, stream=True)
-        if resp.status_code == 200:
-            with open(filepath, "wb") as f:
-                for chunk in resp.iter_content(chunk_size=65536):
-                    f.write(chunk)
-            if os.path.getsize(filepath) > 1000:
-                return filepath
-            else:
-                os.remove(filepath)
-    except Exception:
-        if os.path.exists(filepath):
-            os.remove(filepath)
     return None
 
 
 # ---------------------------------------------------------------------------
 # SOURCE 3: INTERNET ARCHIVE — ADDITIONAL SWEDISH TEXTS
 # ---------------------------------------------------------------------------
-def fetch_ia_swedish_book_ids(rows=2000):
-    """Search Internet Archive for Swedish-language digitized books."""
-    print(f"  Searching Internet Archive for Swedish texts (up to {rows})...")
-    s = get_session()
-    all_ids = []
+# Multiple queries to get diverse results
+IA_QUERIES = [
+    "language:Swedish AND mediatype:texts AND format:Text",
+    "language:Swedish AND mediatype:texts AND subject:Swedish",
+    "language:swe AND mediatype:texts",
+    '(language:Swedish OR language:swe) AND mediatype:texts AND format:"DjVuTXT"',
+]
 
-    # Multiple queries to get diverse results
-    queries = [
-        "language:Swedish AND mediatype:texts AND format:Text",
-        "language:Swedish AND mediatype:texts AND subject:Swedish",
-        "language:swe AND mediatype:texts",
-        '(language:Swedish OR language:swe) AND mediatype:texts AND format:"DjVuTXT"',
-    ]
 
-    seen = set()
-    for q in queries:
-        try:
-            resp = s.get(
-                "https://archive.org/advancedsearch.php",
-                params={
-                    "q": q,
-                    "fl[]": "identifier",
-                    "rows": str(rows),
-                    "output": "json",
-                    "sort[]": "downloads desc",
-                },
-                timeout=60,
-            )
-            resp.raise_for_status()
-            data = resp.json()
-            docs = data.get("response", {}).get("docs", [])
-            for d in docs:
-                ident = d["identifier"]
-                if ident not in seen and not ident.startswith("arkivkopia.se-littbank"):
-                    seen.add(ident)
-                    all_ids.append(ident)
-        except Exception as e:
-            print(f"    [WARN] Query failed: {e}")
-            continue
+def ia_search_params(query, rows):
+    return {
+        "q": query,
+        "fl[]": "identifier",
+        "rows": str(rows),
+        "output": "json",
+        "sort[]": "downloads desc",
+    }
 
+
+def merge_ia_ids(results):
+    """Dedupe identifiers across IA queries, dropping Litteraturbanken items."""
+    seen = set()
+    all_ids = []
+    for ids in results:
+        for ident in ids:
+            if ident not in seen and not ident.startswith("arkivkopia.se-littbank"):
+                seen.add(ident)
+                all_ids.append(ident)
     print(f"    Found {len(all_ids)} additional Swedish texts")
     return all_ids
 
 
-def download_ia_text(identifier, books_dir):
-    """Download text version of an Internet Archive item.
-    Tries: _djvu.txt first, then plain .txt, then .pdf as fallback."""
-    txt_path = os.path.join(books_dir, f"ia_{identifier}.txt")
-    pdf_path = os.path.join(books_dir, f"ia_{identifier}.pdf")
+def ia_paths(identifier, books_dir):
+    return (
+        os.path.join(books_dir, f"ia_{identifier}.txt"),
+        os.path.join(books_dir, f"ia_{identifier}.pdf"),
+    )
 
-    if os.path.exists(txt_path) and os.path.getsize(txt_path) > 500:
-        return txt_path
-    if os.path.exists(pdf_path) and os.path.getsize(pdf_path) > 1000:
-        return pdf_path
 
-    s = get_session()
+def pick_ia_files(files):
+    """Files worth trying from an item's file list, in order.
 
-    # Try to get the file list for this item
-    try:
-        meta_url = f"https://archive.org/metadata/{identifier}/files"
-        resp = s.get(meta_url, timeout=30)
-        if resp.status_code != 200:
-            return None
-        files = resp.json().get("result", [])
-    except Exception:
-        return None
-
-    # Look for text files first (prefer _djvu.txt, then .txt)
+    Text first (_djvu.txt, then other .txt, largest first), then the
+    smallest PDF as a fallback. Yields (name, is_pdf).
+    """
     txt_files = []
     pdf_files = []
     for f in files:
@@ -241,47 +623,456 @@ def download_ia_text(identifier, books_dir):
         elif name.endswith(".pdf") and size > 1000:
             pdf_files.append((name, size))
 
-    # Try text files first
     txt_files.sort(key=lambda x: (x[2], -x[1]))
-    for fname, size, _ in txt_files:
+    picks = [(name, False) for name, _, _ in txt_files]
+    if pdf_files:
+        picks.append((min(pdf_files, key=lambda x: x[1])[0], True))
+    return picks
+
+
+def fetch_ia_swedish_book_ids(rows=2000):
+    """Search Internet Archive for Swedish-language digitized books."""
+    print(f"  Searching Internet Archive for Swedish texts (up to {rows})...")
+    results = []
+    for q in IA_QUERIES:
         try:
-            url = f"https://archive.org/download/{identifier}/{fname}"
-            resp = s.get(url, timeout=120, stream=True)
-            if resp.status_code == 200:
-                with open(txt_path, "wb") as out:
-                    for chunk in resp.iter_content(chunk_size=65536):
-                        out.write(chunk)
-                if os.path.getsize(txt_path) > 500:
-                    return txt_path
-                else:
-                    os.remove(txt_path)
-        except Exception:
-            if os.path.exists(txt_path):
-                os.remove(txt_path)
+            data = get_metadata(f"{ARCHIVE_URL}/advancedsearch.php", ia_search_params(q, rows), 60)
+            results.append(search_ids(json.loads(data)))
+        except Exception as e:
+            print(f"    [WARN] Query failed: {e}")
             continue
+    return merge_ia_ids(results)
 
-    # Fallback to smallest PDF
-    if pdf_files:
-        pdf_files.sort(key=lambda x: x[1])
-        fname = pdf_files[0][0]
+
+def download_ia_text(identifier, books_dir):
+    """Download text version of an Internet Archive item.
+    Tries: _djvu.txt first, then plain .txt, then .pdf as fallback."""
+    txt_path, pdf_path = ia_paths(identifier, books_dir)
+    if have_file(txt_path, 500):
+        return txt_path
+    if have_file(pdf_path, 1000):
+        return pdf_path
+
+    # Try to get the file list for this item
+    try:
+        meta = json.loads(get_metadata(f"{ARCHIVE_URL}/metadata/{identifier}/files"))
+        files = meta.get("result", [])
+    except Exception:
+        return None
+
+    for fname, is_pdf in pick_ia_files(files):
+        url = f"{ARCHIVE_URL}/download/{identifier}/{fname}"
+        path, min_size = (pdf_path, 1000) if is_pdf else (txt_path, 500)
+        if download_to(url, path, min_size):
+            return path
+    return None
+
+
+# ---------------------------------------------------------------------------
+# CONCURRENT DOWNLOADS
+# ---------------------------------------------------------------------------
+class Lane:
+    """One source's download queue; `host` selects its politeness limits."""
+
+    def __init__(self, label, prefix, items, download, host):
+        self.label = label
+        self.prefix = prefix
+        self.total = len(items)
+        self.items = iter(items)
+        self.download = download
+        self.limit = host_limit(host)
+        self.done = 0
+        self.failed = 0
+
+
+def run_downloads(lanes, workers, want=None):
+    """Download every lane's items on a thread pool, up to `workers` in flight.
+
+    Each host gets at most its max_conn transfers at once. Earlier lanes
+    take a free slot before later ones, and a lane on another host fills
+    slots its neighbours cannot use, so sources proceed in parallel at
+    their own rates. Yields (lane, item, result) in completion order; the
+    caller handles results in the main thread, so log and progress updates
+    need no locking. With `want` set, no new download starts once that
+    many have succeeded or are still running.
+    """
+    def task(lane, item):
         try:
-            url = f"https://archive.org/download/{identifier}/{fname}"
-            resp = s.get(url, timeout=120, stream=True)
-            if resp.status_code == 200:
-                with open(pdf_path, "wb") as out:
-                    for chunk in resp.iter_content(chunk_size=65536):
-                        out.write(chunk)
-                if os.path.getsize(pdf_path) > 1000:
-                    return pdf_path
-                else:
-                    os.remove(pdf_path)
+            return lane.download(item)
         except Exception:
-            if os.path.exists(pdf_path):
-                os.remove(pdf_path)
+            return None
+
+    running = {}
+    succeeded = 0
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+    try:
+        while True:
+            _start_jobs(lanes, running, workers, want, succeeded,
+                        lambda lane, item: pool.submit(task, lane, item))
+            if not running:
+                break
+            finished, _ = concurrent.futures.wait(
+                running, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in finished:
+                lane, item = running.pop(future)
+                lane.limit.in_flight -= 1
+                result = future.result()
+                if result:
+                    succeeded += 1
+                yield lane, item, result
+    finally:
+        # On Ctrl-C or an early break, drop queued work instead of finishing it
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _start_jobs(lanes, running, workers, want, succeeded, start):
+    """Start (lane, item) jobs while the worker, per-host and `want` caps allow.
+
+    start(lane, item) returns a future/task, recorded in `running`.
+    """
+    end = object()
+    for lane in lanes:
+        while (
+            len(running) < workers
+            and lane.limit.in_flight < lane.limit.max_conn
+            and (want is None or succeeded + len(running) < want)
+        ):
+            item = next(lane.items, end)
+            if item is end:
+                break
+            lane.limit.in_flight += 1
+            running[start(lane, item)] = (lane, item)
+
+
+def build_lanes(gutenberg_ids, littbank_ids, ia_ids, downloaders, already):
+    """Lanes in priority order: Gutenberg .txt, Litteraturbanken PDFs, then IA.
+
+    littbank_ids is None with --skip-pdf. downloaders maps a lane prefix to
+    its download(item) callable.
+    """
+    lanes = [
+        Lane(
+            "Gutenberg", "gutenberg",
+            [i for i in gutenberg_ids if f"gutenberg_{i}" not in already],
+            downloaders["gutenberg"], urlparse(GUTENBERG_URL).hostname,
+        ),
+    ]
+    if littbank_ids is not None:
+        lanes.append(Lane(
+            "Litteraturbanken", "littbank",
+            [i for i in littbank_ids if f"littbank_{i}" not in already],
+            downloaders["littbank"], urlparse(ARCHIVE_URL).hostname,
+        ))
+    lanes.append(Lane(
+        "Internet Archive", "ia",
+        [i for i in ia_ids if f"ia_{i}" not in already],
+        downloaders["ia"], urlparse(ARCHIVE_URL).hostname,
+    ))
+    return lanes
+
+
+def threaded_downloads(args, already, want, on_lanes, on_result):
+    """Fetch catalogs, then download on the thread pool.
+
+    on_lanes(lanes) runs once before the first download; on_result(lane,
+    item, result) runs in the calling thread for every finished item.
+    """
+    print(f"\n  --- Fetching catalogs ---")
+    with concurrent.futures.ThreadPoolExecutor(max_workers=3) as pool:
+        gutenberg_ids = pool.submit(fetch_gutenberg_swedish_ids)
+        littbank_ids = None if args.skip_pdf else pool.submit(fetch_litteraturbanken_ids)
+        ia_ids = pool.submit(fetch_ia_swedish_book_ids, 3000)
+
+    lanes = build_lanes(
+        gutenberg_ids.result(),
+        littbank_ids and littbank_ids.result(),
+        ia_ids.result(),
+        {
+            "gutenberg": lambda book_id: download_gutenberg_book(book_id, BOOKS_DIR),
+            "littbank": lambda ident: download_litteraturbanken_pdf(ident, BOOKS_DIR),
+            "ia": lambda ident: download_ia_text(ident, BOOKS_DIR),
+        },
+        already,
+    )
+    on_lanes(lanes)
+    for lane, item, result in run_downloads(lanes, args.workers, want):
+        on_result(lane, item, result)
+
+
+# ---------------------------------------------------------------------------
+# ASYNC ENGINE (--engine async, needs aiohttp)
+# ---------------------------------------------------------------------------
+# One event loop drives every source. Metadata lookups and downloads overlap
+# on keep-alive connections, with the same lanes, per-host caps and token
+# buckets as the thread engine. aiohttp follows redirects inside one
+# request, so only the first hop of a redirect is paced.
+async def _paced(url):
+    delay = host_limit(urlparse(url).hostname).bucket.reserve()
+    if delay:
+        await asyncio.sleep(delay)
+
+
+def _client_timeout(timeout):
+    return aiohttp.ClientTimeout(sock_connect=timeout, sock_read=timeout)
+
+
+async def get_metadata_async(http, url, params=None, timeout=30):
+    """Async get_metadata, sharing the same on-disk cache."""
+    cache = METADATA_CACHE
+    key = MetadataCache.key(url, params)
+    entry = cache.lookup(key) if cache else None
+    if entry is not None and cache.is_fresh(entry):
+        cache.count("fresh")
+        return entry["body"]
+    await _paced(url)
+    async with http.get(
+        url,
+        params=params,
+        headers=MetadataCache.conditional_headers(entry),
+        timeout=_client_timeout(timeout),
+    ) as resp:
+        if resp.status == 304 and entry is not None:
+            cache.touch(entry)
+            return entry["body"]
+        if resp.status != 200:
+            resp.raise_for_status()
+            raise aiohttp.ClientResponseError(
+                resp.request_info, resp.history, status=resp.status, message="unexpected status"
+            )
+        body = await resp.text()
+    if cache:
+        cache.store(key, body, resp.headers)
+    return body
+
+
+async def download_to_async(http, url, path, min_size, timeout=120):
+    """Async download_to: same .part file, Range resume and rename."""
+    part = part_path(path, url)
+    for _ in range(2):
+        offset, meta = _resume_point(part)
+        headers = _range_headers(offset, meta.get("validator"))
+        await _paced(url)
+        try:
+            async with http.get(url, headers=headers, timeout=_client_timeout(timeout)) as resp:
+                mode = _resume_mode(resp.status, resp.headers.get("Content-Range"),
+                                    offset, meta.get("size"))
+                if mode == "done":
+                    return _finish_part(part, path, min_size)
+                if mode is None:
+                    _discard_part(part)
+                    if offset:
+                        continue
+                    return False
+                if mode == "wb":
+                    _write_part_meta(part, resp.headers)
+                with open(part, mode) as f:
+                    async for chunk in resp.content.iter_chunked(65536):
+                        f.write(chunk)
+        except (aiohttp.ClientError, asyncio.TimeoutError, OSError):
+            return False
+        return _finish_part(part, path, min_size)
+    return False
+
+
+async def fetch_gutenberg_swedish_ids_async(http):
+    print("  Fetching Project Gutenberg Swedish catalog...")
+    try:
+        html = await get_metadata_async(http, gutenberg_catalog_url())
+    except Exception as e:
+        print(f"    [WARN] Could not fetch Gutenberg catalog: {e}")
+        return []
+    return parse_gutenberg_ids(html)
+
+
+async def fetch_litteraturbanken_ids_async(http):
+    print("  Fetching Litteraturbanken collection from Internet Archive...")
+    try:
+        data = await get_metadata_async(http, f"{ARCHIVE_URL}/advancedsearch.php", LITTBANK_SEARCH, 60)
+        ids = search_ids(json.loads(data))
+    except Exception as e:
+        print(f"    [WARN] Could not fetch Litteraturbanken: {e}")
+        return []
+    print(f"    Found {len(ids)} Litteraturbanken items")
+    return ids
+
+
+async def fetch_ia_swedish_book_ids_async(http, rows=2000):
+    print(f"  Searching Internet Archive for Swedish texts (up to {rows})...")
+
+    async def query(q):
+        try:
+            data = await get_metadata_async(
+                http, f"{ARCHIVE_URL}/advancedsearch.php", ia_search_params(q, rows), 60
+            )
+            return search_ids(json.loads(data))
+        except Exception as e:
+            print(f"    [WARN] Query failed: {e}")
+            return []
+
+    return merge_ia_ids(await asyncio.gather(*(query(q) for q in IA_QUERIES)))
+
+
+async def download_gutenberg_book_async(http, book_id, books_dir):
+    filename = os.path.join(books_dir, f"gutenberg_{book_id}.txt")
+    if have_file(filename, 500):
+        return filename
+    for url in gutenberg_book_urls(book_id):
+        if await download_to_async(http, url, filename, 500, timeout=30):
+            return filename
+    return None
+
+
+async def download_litteraturbanken_pdf_async(http, identifier, books_dir):
+    url, filepath = littbank_pdf(identifier, books_dir)
+    if have_file(filepath, 1000):
+        return filepath
+    if await download_to_async(http, url, filepath, 1000):
+        return filepath
+    return None
+
 
+async def download_ia_text_async(http, identifier, books_dir):
+    txt_path, pdf_path = ia_paths(identifier, books_dir)
+    if have_file(txt_path, 500):
+        return txt_path
+    if have_file(pdf_path, 1000):
+        return pdf_path
+    try:
+        meta = json.loads(
+            await get_metadata_async(http, f"{ARCHIVE_URL}/metadata/{identifier}/files")
+        )
+        files = meta.get("result", [])
+    except Exception:
+        return None
+    for fname, is_pdf in pick_ia_files(files):
+        url = f"{ARCHIVE_URL}/download/{identifier}/{fname}"
+        path, min_size = (pdf_path, 1000) if is_pdf else (txt_path, 500)
+        if await download_to_async(http, url, path, min_size):
+            return path
     return None
 
 
+async def run_downloads_async(lanes, workers, want=None):
+    """Async run_downloads: lane downloads are coroutines run as tasks."""
+    async def task(lane, item):
+        try:
+            return await lane.download(item)
+        except Exception:
+            return None
+
+    running = {}
+    succeeded = 0
+    try:
+        while True:
+            _start_jobs(lanes, running, workers, want, succeeded,
+                        lambda lane, item: asyncio.ensure_future(task(lane, item)))
+            if not running:
+                break
+            finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for done_task in finished:
+                lane, item = running.pop(done_task)
+                lane.limit.in_flight -= 1
+                result = done_task.result()
+                if result:
+                    succeeded += 1
+                yield lane, item, result
+    finally:
+        for pending in running:
+            pending.cancel()
+
+
+async def async_downloads(args, already, want, on_lanes, on_result):
+    """Async counterpart of threaded_downloads, reporting through callbacks."""
+    connector = aiohttp.TCPConnector(limit=max(args.workers, 10), keepalive_timeout=30)
+    async with aiohttp.ClientSession(
+        headers={"User-Agent": USER_AGENT}, connector=connector
+    ) as http:
+        print(f"\n  --- Fetching catalogs ---")
+        gutenberg_ids, littbank_ids, ia_ids = await asyncio.gather(
+            fetch_gutenberg_swedish_ids_async(http),
+            # sleep(0) stands in for the skipped fetch and yields None
+            asyncio.sleep(0) if args.skip_pdf else fetch_litteraturbanken_ids_async(http),
+            fetch_ia_swedish_book_ids_async(http, 3000),
+        )
+        lanes = build_lanes(
+            gutenberg_ids,
+            littbank_ids,
+            ia_ids,
+            {
+                "gutenberg": lambda book_id: download_gutenberg_book_async(http, book_id, BOOKS_DIR),
+                "littbank": lambda ident: download_litteraturbanken_pdf_async(http, ident, BOOKS_DIR),
+                "ia": lambda ident: download_ia_text_async(http, ident, BOOKS_DIR),
+            },
+            already,
+        )
+        on_lanes(lanes)
+        async for lane, item, result in run_downloads_async(lanes, args.workers, want):
+            on_result(lane, item, result)
+
+
+# ---------------------------------------------------------------------------
+# DOWNLOAD-TO-COUNT PIPELINE (--count)
+# ---------------------------------------------------------------------------
+class CountPipeline:
+    """Count finished downloads on a process pool while others are in flight.
+
+    Counts land in build.py's per-file count cache, so the next build.py
+    run only has to merge them. Results are collected from the thread that
+    submits, so the cache dict is never shared between threads.
+    """
+
+    def __init__(self, workers):
+        import build  # only needed in this mode
+
+        self.build = build
+        self.cache = build.load_count_cache()
+        # spawn: forking while download threads hold locks is unsafe
+        self.pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        self.pending = set()
+        self.counted = 0
+        self.cached = 0
+        self.failed = 0
+
+    def submit(self, filepath):
+        if os.path.splitext(filepath)[1].lower() not in self.build.HANDLERS:
+            return
+        if self.build.lookup_cached(self.cache, filepath, os.stat(filepath)):
+            self.cached += 1
+        else:
+            self.pending.add(self.pool.submit(self.build.count_into_cache, filepath))
+        self.collect()
+
+    def collect(self, wait=False):
+        finished = set(self.pending) if wait else {f for f in self.pending if f.done()}
+        for future in finished:
+            self.pending.discard(future)
+            try:
+                filepath, digest, words, screen = future.result()
+            except Exception:
+                self.failed += 1
+                continue
+            if digest is None:
+                self.failed += 1
+                continue
+            self.build.record_cached(self.cache, filepath, digest, words, os.stat(filepath),
+                                     screen)
+            self.counted += 1
+
+    def close(self, cancel=False):
+        """Finish (or, with cancel, drop) queued counts and save the cache."""
+        if cancel:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+            self.pending = {f for f in self.pending if not f.cancelled()}
+        if self.pending:
+            print(f"\n    Counting the last {len(self.pending)} books...")
+        self.collect(wait=True)
+        self.pool.shutdown()
+        self.build.save_count_cache(self.cache)
+
+
 # ---------------------------------------------------------------------------
 # PROGRESS DISPLAY
 # ---------------------------------------------------------------------------
@@ -300,6 +1091,7 @@ def print_progress(label, done, total, failed):
 # MAIN
 # ---------------------------------------------------------------------------
 def main():
+    global GUTENBERG_URL, ARCHIVE_URL, METADATA_CACHE
     parser = argparse.ArgumentParser(description="Download ~2000 Swedish books")
     parser.add_argument(
         "--limit", type=int, default=2000,
@@ -311,13 +1103,63 @@ def main():
     )
     parser.add_argument(
         "--workers", type=int, default=5,
-        help="Parallel download workers (default: 5, be polite)",
+        help="Parallel download workers across all hosts (default: 5, be polite)",
+    )
+    parser.add_argument(
+        "--host-limit", type=parse_host_limit, action="append", default=[],
+        metavar="HOST=RPS[:CONN]",
+        help="Per-host requests/sec and max concurrent downloads, e.g. "
+        "gutenberg.org=1:2 (repeatable; defaults: "
+        + ", ".join(f"{h}={r:g}:{c}" for h, (r, c) in HOST_LIMITS.items()) + ")",
+    )
+    parser.add_argument(
+        "--engine", choices=("threads", "async"), default="threads",
+        help="Download engine: a thread pool, or one asyncio event loop "
+        "(needs aiohttp) (default: threads)",
+    )
+    parser.add_argument(
+        "--gutenberg-url", default=GUTENBERG_URL,
+        help=f"Project Gutenberg base URL (default: {GUTENBERG_URL})",
+    )
+    parser.add_argument(
+        "--archive-url", default=ARCHIVE_URL,
+        help=f"Internet Archive base URL (default: {ARCHIVE_URL})",
+    )
+    parser.add_argument(
+        "--count", action="store_true",
+        help="Count each finished book into build.py's count cache while "
+        "other downloads continue",
+    )
+    parser.add_argument(
+        "--count-workers", type=int, default=os.cpu_count() or 2,
+        help="Tokenizer processes for --count (default: CPU count)",
+    )
+    parser.add_argument(
+        "--metadata-ttl", type=float, default=0, metavar="HOURS",
+        help="Reuse cached catalog/search/file-list responses this long without "
+        "asking the server; older ones are revalidated with conditional GETs "
+        "(default: 0, always revalidate)",
+    )
+    parser.add_argument(
+        "--no-metadata-cache", action="store_true",
+        help=f"Do not read or write {METADATA_CACHE_DIR}/",
     )
     args = parser.parse_args()
+    args.workers = max(args.workers, 1)
+    if args.engine == "async" and not ASYNC_SUPPORT:
+        print("  ERROR: --engine async needs aiohttp (pip install aiohttp)")
+        sys.exit(1)
+    GUTENBERG_URL = args.gutenberg_url.rstrip("/")
+    ARCHIVE_URL = args.archive_url.rstrip("/")
+    for host, rate, max_conn in args.host_limit:
+        HOST_LIMITS[host] = (rate, max_conn)
+    get_session(args.workers)
+    if not args.no_metadata_cache:
+        METADATA_CACHE = MetadataCache(ttl=args.metadata_ttl * 3600)
 
     os.makedirs(BOOKS_DIR, exist_ok=True)
-    log = load_log()
-    already = set(log["downloaded"])
+    log = DownloadLog().load()
+    already = set(log.downloaded)
     total_downloaded = len(already)
     target = args.limit
 
@@ -326,100 +1168,68 @@ def main():
     print("=" * 60)
     print(f"\n  Target: {target} books")
     print(f"  Already downloaded: {total_downloaded}")
-    print(f"  Workers: {args.workers}")
+    print(f"  Workers: {args.workers} ({args.engine})")
     print(f"  Skip PDFs: {args.skip_pdf}")
 
     if total_downloaded >= target:
         print(f"\n  Already have {total_downloaded} books. Done!")
         return
 
-    # ---- SOURCE 1: Project Gutenberg ----
-    print(f"\n  --- Source 1: Project Gutenberg ---")
-    gutenberg_ids = fetch_gutenberg_swedish_ids()
-    gutenberg_ids = [i for i in gutenberg_ids if f"gutenberg_{i}" not in already]
-
-    if gutenberg_ids and total_downloaded < target:
-        remaining = target - total_downloaded
-        batch = gutenberg_ids[:remaining]
-        done = 0
-        failed = 0
-        print(f"    Downloading up to {len(batch)} Gutenberg books...")
-
-        for book_id in batch:
-            result = download_gutenberg_book(book_id, BOOKS_DIR)
-            done += 1
-            if result:
-                log["downloaded"].append(f"gutenberg_{book_id}")
-                total_downloaded += 1
-            else:
-                failed += 1
-                log["failed"].append(f"gutenberg_{book_id}")
-            print_progress("Gutenberg", done, len(batch), failed)
-            time.sleep(0.3)
-
-        print()
-        save_log(log)
-        print(f"    Gutenberg done. Total so far: {total_downloaded}")
-
-    # ---- SOURCE 2: Litteraturbanken (PDFs) ----
-    if not args.skip_pdf and total_downloaded < target:
-        print(f"\n  --- Source 2: Litteraturbanken (PDFs) ---")
-        littbank_ids = fetch_litteraturbanken_ids()
-        littbank_ids = [i for i in littbank_ids if f"littbank_{i}" not in already]
-
-        if littbank_ids:
-            remaining = target - total_downloaded
-            batch = littbank_ids[:remaining]
-            done = 0
-            failed = 0
-            print(f"    Downloading up to {len(batch)} Litteraturbanken PDFs...")
-
-            for ident in batch:
-                result = download_litteraturbanken_pdf(ident, BOOKS_DIR)
-                done += 1
-                if result:
-                    log["downloaded"].append(f"littbank_{ident}")
-                    total_downloaded += 1
-                else:
-                    failed += 1
-                    log["failed"].append(f"littbank_{ident}")
-                print_progress("Littbank", done, len(batch), failed)
-                time.sleep(0.5)
-
-            print()
-            save_log(log)
-            print(f"    Litteraturbanken done. Total so far: {total_downloaded}")
-
-    # ---- SOURCE 3: Internet Archive additional ----
-    if total_downloaded < target:
-        print(f"\n  --- Source 3: Internet Archive (additional Swedish texts) ---")
-        ia_ids = fetch_ia_swedish_book_ids(rows=3000)
-        ia_ids = [i for i in ia_ids if f"ia_{i}" not in already]
-
-        if ia_ids:
-            remaining = target - total_downloaded
-            batch = ia_ids[:remaining]
-            done = 0
-            failed = 0
-            print(f"    Downloading up to {len(batch)} IA texts...")
-
-            for ident in batch:
-                if total_downloaded >= target:
-                    break
-                result = download_ia_text(ident, BOOKS_DIR)
-                done += 1
-                if result:
-                    log["downloaded"].append(f"ia_{ident}")
-                    total_downloaded += 1
-                else:
-                    failed += 1
-                    log["failed"].append(f"ia_{ident}")
-                print_progress("IA", done, len(batch), failed)
-                time.sleep(0.5)
-
-            print()
-            save_log(log)
-            print(f"    IA done. Total so far: {total_downloaded}")
+    # ---- DOWNLOAD (all sources at once, each host at its own rate) ----
+    remaining = target - total_downloaded
+    done = 0
+    failed = 0
+    progress_total = remaining
+    lanes = []
+
+    def on_lanes(new_lanes):
+        nonlocal progress_total
+        lanes.extend(new_lanes)
+        for lane in lanes:
+            print(f"    {lane.label}: {lane.total} to fetch "
+                  f"({lane.limit.rate:g} req/s, {lane.limit.max_conn} connections to {lane.limit.host})")
+        progress_total = min(sum(lane.total for lane in lanes), remaining)
+        print(f"\n    Downloading up to {remaining} books...")
+
+    def on_result(lane, item, result):
+        nonlocal done, failed, total_downloaded
+        done += 1
+        lane.done += 1
+        log.record(f"{lane.prefix}_{item}", bool(result))
+        if result:
+            total_downloaded += 1
+            if pipeline is not None:
+                pipeline.submit(result)
+        else:
+            failed += 1
+            lane.failed += 1
+        print_progress("All", done, max(progress_total, done), failed)
+
+    pipeline = CountPipeline(max(args.count_workers, 1)) if args.count else None
+    try:
+        if args.engine == "async":
+            asyncio.run(async_downloads(args, already, remaining, on_lanes, on_result))
+        else:
+            threaded_downloads(args, already, remaining, on_lanes, on_result)
+    except KeyboardInterrupt:
+        if pipeline is not None:
+            pipeline.close(cancel=True)
+        raise
+    finally:
+        log.close()
+
+    print()
+    if pipeline is not None:
+        pipeline.close()
+        print(f"    Counted {pipeline.counted} books into {pipeline.build.COUNT_CACHE_DIR}/ "
+              f"({pipeline.cached} already cached, {pipeline.failed} without text)")
+    for lane in lanes:
+        print(f"    {lane.label}: {lane.done - lane.failed} downloaded, {lane.failed} failed")
+    print(f"    Total so far: {total_downloaded}")
+    if METADATA_CACHE is not None:
+        stats = METADATA_CACHE.stats
+        print(f"    Metadata: {stats['fresh']} from cache, {stats['revalidated']} revalidated (304), "
+              f"{stats['fetched']} fetched")
 
     # ---- SUMMARY ----
     # Count files actually in books/
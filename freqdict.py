@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+freqdict.py — Binary word frequency dictionary (written by build.py)
+
+swedish_word_frequencies.txt has to be parsed in full before a single word
+can be looked up. The .bin file build.py writes next to it is laid out so
+a reader can mmap it and binary-search a word without loading anything:
+
+    header   "FKD1", offset typecode, count typecode, entry count,
+             string table length, total words            (32 bytes)
+    offsets  n + 1 unsigned ints; word i is table[offsets[i]:offsets[i+1]]
+    counts   n unsigned ints parallel to the words
+    table    the words, UTF-8, sorted, concatenated
+
+Offsets and counts are 8-byte aligned. UTF-8 byte order equals code point
+order, so the table is sorted the same way as sorted(words).
+
+Usage:
+    python freqdict.py swedish_word_frequencies.bin och hus   # look up words
+    python freqdict.py swedish_word_frequencies.bin --prefix skär
+
+    from freqdict import FrequencyDict
+    with FrequencyDict("swedish_word_frequencies.bin") as fd:
+        fd.get("och"), "hus" in fd, fd.total
+"""
+
+import argparse
+import bisect
+import itertools
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+_HEADER = struct.Struct("<4sccxxIQQ4x")
+_MAGIC = b"FKD1"
+
+
+def _pad(n):
+    return -n % 8
+
+
+def write_freq_dict(counts, path, total=None):
+    """Write {word: count} to path in the binary format, atomically.
+
+    total defaults to the sum of the counts. Returns the number of entries.
+    """
+    words = sorted(counts)
+    # Byte offsets, not character offsets: å, ä and ö are two bytes each
+    encoded = [word.encode("utf-8") for word in words]
+    blob = b"".join(encoded)
+    offsets = array("I" if len(blob) < 2**32 else "Q",
+                    itertools.accumulate(map(len, encoded), initial=0))
+    try:
+        values = array("I", map(counts.__getitem__, words))
+    except OverflowError:
+        values = array("Q", map(counts.__getitem__, words))
+    if total is None:
+        total = sum(values)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, offsets.typecode.encode(), values.typecode.encode(),
+                             len(words), len(blob), total))
+        for part in (offsets.tobytes(), values.tobytes()):
+            f.write(part)
+            f.write(b"\0" * _pad(len(part)))
+        f.write(blob)
+    os.replace(tmp_path, path)
+    return len(words)
+
+
+class _Keys:
+    """The sorted words as a sequence of bytes, for bisect."""
+
+    def __init__(self, fd):
+        self.fd = fd
+
+    def __len__(self):
+        return len(self.fd)
+
+    def __getitem__(self, i):
+        return self.fd._word_bytes(i)
+
+
+class FrequencyDict:
+    """Read-only, memory-mapped view of a binary frequency dictionary.
+
+    Opening maps the file and reads the header; lookups binary-search the
+    string table in O(log n) and touch only the pages they compare.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            off_type, count_type, n, total, off_pos, count_pos, table_pos = self._layout(path)
+        except ValueError:
+            self._mm.close()
+            raise
+        view = memoryview(self._mm)
+        self._offsets = view[off_pos:count_pos].cast(off_type)[: n + 1]
+        self._counts = view[count_pos:table_pos].cast(count_type)[:n]
+        self._table = table_pos
+        self.total = total
+        self._n = n
+        self._keys = _Keys(self)
+
+    def _layout(self, path):
+        try:
+            magic, off_type, count_type, n, blob_len, total = _HEADER.unpack_from(self._mm)
+        except struct.error:
+            raise ValueError(f"{path}: truncated frequency dictionary") from None
+        off_type = off_type.decode("ascii", "replace")
+        count_type = count_type.decode("ascii", "replace")
+        if magic != _MAGIC or off_type not in "IQ" or count_type not in "IQ":
+            raise ValueError(f"{path}: not a frequency dictionary")
+        off_size = (n + 1) * struct.calcsize(off_type)
+        count_size = n * struct.calcsize(count_type)
+        off_pos = _HEADER.size
+        count_pos = off_pos + off_size + _pad(off_size)
+        table_pos = count_pos + count_size + _pad(count_size)
+        if table_pos + blob_len > len(self._mm):
+            raise ValueError(f"{path}: truncated frequency dictionary")
+        return off_type, count_type, n, total, off_pos, count_pos, table_pos
+
+    def _word_bytes(self, i):
+        return self._mm[self._table + self._offsets[i] : self._table + self._offsets[i + 1]]
+
+    def _index(self, word):
+        key = word.encode("utf-8")
+        i = bisect.bisect_left(self._keys, key)
+        if i < self._n and self._word_bytes(i) == key:
+            return i
+        return None
+
+    def get(self, word, default=0):
+        i = self._index(word)
+        return default if i is None else self._counts[i]
+
+    def __getitem__(self, word):
+        i = self._index(word)
+        if i is None:
+            raise KeyError(word)
+        return self._counts[i]
+
+    def __contains__(self, word):
+        return self._index(word) is not None
+
+    def __len__(self):
+        return self._n
+
+    def items(self, start=0, stop=None):
+        """(word, count) pairs in sorted order, from index start to stop."""
+        for i in range(start, self._n if stop is None else stop):
+            yield self._word_bytes(i).decode("utf-8"), self._counts[i]
+
+    def __iter__(self):
+        return (word for word, _ in self.items())
+
+    def prefix(self, prefix):
+        """(word, count) pairs for every word starting with prefix."""
+        key = prefix.encode("utf-8")
+        start = bisect.bisect_left(self._keys, key)
+        stop = start
+        while stop < self._n and self._word_bytes(stop).startswith(key):
+            stop += 1
+        return self.items(start, stop)
+
+    def close(self):
+        # Views into the map must be released before it can be closed
+        for name in ("_offsets", "_counts"):
+            view = self.__dict__.pop(name, None)
+            if view is not None:
+                view.release()
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Look up words in a binary frequency dictionary")
+    parser.add_argument("path", help="Dictionary file (e.g. swedish_word_frequencies.bin)")
+    parser.add_argument("words", nargs="*", help="Words to look up")
+    parser.add_argument("--prefix", default=None, help="List every word starting with PREFIX")
+    args = parser.parse_args()
+
+    try:
+        fd = FrequencyDict(args.path)
+    except (OSError, ValueError) as e:
+        print(f"  ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+    with fd:
+        print(f"  {len(fd):,} words, {fd.total:,} tokens")
+        for word in args.words:
+            count = fd.get(word.lower())
+            share = count / fd.total * 100 if fd.total else 0
+            print(f"  {word}\t{count}\t{share:.4f}%")
+        if args.prefix:
+            for word, count in fd.prefix(args.prefix.lower()):
+                print(f"  {word}\t{count}")
+
+
+if __name__ == "__main__":
+    main()